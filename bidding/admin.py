@@ -1,6 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Item, Bid
+from .models import (
+    User, Item, Bid, ArchivedBid, OutbidNotification, WatchlistEntry,
+    IdempotencyKey
+)
+from .archive import reopen_item
+from .thumbnails import enqueue_thumbnail
 
 
 @admin.register(User)
@@ -20,7 +25,21 @@ class ItemAdmin(admin.ModelAdmin):
     list_display = ('title', 'starting_price', 'current_highest_bid', 'is_active', 'created_by', 'created_at')
     list_filter = ('is_active', 'created_at', 'created_by')
     search_fields = ('title', 'description')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'thumbnail')
+
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            obj.thumbnail = ''
+        # A closed item only becomes active again once its archived bids are back
+        reopening = change and 'is_active' in form.changed_data and obj.is_active
+        if reopening:
+            obj.is_active = False
+        super().save_model(request, obj, form, change)
+        if reopening:
+            reopen_item(obj.pk)
+            obj.is_active = True
+        if 'image' in form.changed_data:
+            enqueue_thumbnail(obj)
 
 
 @admin.register(Bid)
@@ -29,3 +48,32 @@ class BidAdmin(admin.ModelAdmin):
     list_filter = ('bid_time', 'item', 'user')
     readonly_fields = ('bid_time',)
     ordering = ('-bid_time',)
+
+
+@admin.register(ArchivedBid)
+class ArchivedBidAdmin(admin.ModelAdmin):
+    list_display = ('item', 'user', 'bid_amount', 'bid_time', 'archived_at')
+    list_filter = ('archived_at', 'item')
+    ordering = ('-bid_time',)
+
+
+@admin.register(OutbidNotification)
+class OutbidNotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'item', 'bid_amount', 'outbid_count', 'is_read', 'updated_at')
+    list_filter = ('is_read', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(WatchlistEntry)
+class WatchlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'item', 'created_at')
+    list_filter = ('created_at',)
+    readonly_fields = ('created_at',)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'key', 'status_code', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('key', 'user__username')
+    readonly_fields = ('created_at',)
@@ -0,0 +1,243 @@
+"""Auction analytics computed with NumPy.
+
+Bid columns for every requested item (live and archived) are streamed from
+``values_list`` into one structured array sorted by (item, time). Every
+metric is then computed for all items at once with grouped reductions
+instead of per-item loops. Closed items rarely change, so their results are
+stored as ``AnalyticsSnapshot`` rows, which every worker reads. Snapshots
+expire after ``BIDDING_ANALYTICS_TTL`` and are deleted when the item is
+reopened (see ``archive.reopen_item``).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AnalyticsSnapshot, ArchivedBid, Bid, Item
+
+# Above this many items, load every bid and filter in NumPy rather than with a huge IN (...)
+MAX_IN_FILTER = 5000
+FETCH_SIZE = 100000
+
+# Allowed downsampling sizes for price curves, bounding the snapshots kept per item
+CURVE_POINT_CHOICES = (50, 100, 200, 500)
+
+BID_DTYPE = np.dtype([('item', 'i8'), ('user', 'i8'), ('amount', 'f8'), ('time', 'f8')])
+
+
+STATS = 'stats'
+
+
+def _curve_kind(points):
+    return f'curve:{points}'
+
+
+def get_ttl():
+    return getattr(settings, 'BIDDING_ANALYTICS_TTL', timedelta(days=1))
+
+
+def _snapshots(kind, item_ids=None):
+    """{item id: data} of fresh snapshots of closed items"""
+    snapshots = AnalyticsSnapshot.objects.filter(
+        kind=kind, item__is_active=False, computed_at__gte=timezone.now() - get_ttl()
+    )
+    if item_ids is not None:
+        snapshots = snapshots.filter(item_id__in=item_ids)
+    return dict(snapshots.values_list('item_id', 'data'))
+
+
+def _store(kind, results):
+    """Save {item id: data} snapshots of items that are still closed"""
+    now = timezone.now()
+    with transaction.atomic():
+        AnalyticsSnapshot.objects.bulk_create(
+            [AnalyticsSnapshot(item_id=pk, kind=kind, data=data, computed_at=now)
+             for pk, data in results.items()],
+            batch_size=500, update_conflicts=True,
+            unique_fields=['item', 'kind'], update_fields=['data', 'computed_at'],
+        )
+        # An item reopened while we computed must not keep what we just wrote
+        AnalyticsSnapshot.objects.filter(kind=kind, item__is_active=True).delete()
+
+
+def load_bids(item_ids=None):
+    """Load bids (live and archived) as a BID_DTYPE array sorted by item, then time"""
+    wanted = None if item_ids is None else np.fromiter(item_ids, dtype='i8')
+    chunks = []
+    for model in (Bid, ArchivedBid):
+        rows = model.objects.order_by()
+        if wanted is not None and len(wanted) <= MAX_IN_FILTER:
+            rows = rows.filter(item_id__in=wanted.tolist())
+        rows = rows.values_list('item_id', 'user_id', 'bid_amount', 'bid_time')
+        # Read through a raw cursor: the ORM's per-value converters cost far
+        # more than converting whole columns with NumPy
+        sql, params = rows.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            while batch := cursor.fetchmany(FETCH_SIZE):
+                items, users, amounts, times = zip(*batch)
+                chunk = np.empty(len(batch), dtype=BID_DTYPE)
+                chunk['item'] = items
+                chunk['user'] = users
+                chunk['amount'] = np.asarray(amounts, dtype='f8')
+                chunk['time'] = _epoch_seconds(times)
+                chunks.append(chunk)
+    bids = np.concatenate(chunks) if chunks else np.empty(0, dtype=BID_DTYPE)
+    if wanted is not None and len(wanted) > MAX_IN_FILTER:
+        bids = bids[np.isin(bids['item'], wanted)]
+    return bids[np.lexsort((bids['time'], bids['item']))]
+
+
+def _epoch_seconds(values):
+    if isinstance(values[0], str):
+        # SQLite returns UTC timestamps as text, which NumPy parses in bulk
+        return np.array(values, dtype='datetime64[us]').astype('i8') / 1e6
+    return np.fromiter((value.timestamp() for value in values), dtype='f8', count=len(values))
+
+
+def compute_stats(bids, window=3600):
+    """Per-item metrics for a sorted BID_DTYPE array, keyed by item id.
+
+    ``peak_bids_per_hour`` is the most bids in any ``window`` seconds.
+    """
+    if not len(bids):
+        return {}
+    item, user, amount, time = bids['item'], bids['user'], bids['amount'], bids['time']
+    item_ids, starts, counts = np.unique(item, return_index=True, return_counts=True)
+    ends = starts + counts - 1
+    first_time, last_time = time[starts], time[ends]
+    duration = last_time - first_time
+
+    # Peak bids within any `window` seconds: offset each item's times so one
+    # searchsorted over the whole array never crosses item boundaries
+    rank = np.repeat(np.arange(len(item_ids)), counts)
+    span = (time.max() - time.min()) + window + 1
+    key = rank * span + (time - time.min())
+    in_window = np.arange(len(key)) - np.searchsorted(key, key - window, side='left') + 1
+    peak_window = np.maximum.reduceat(in_window, starts)
+
+    # Each bidder is engaged from their first to their last bid on the item;
+    # peak concurrency is the largest overlap of those intervals
+    by_bidder = np.lexsort((time, user, item))
+    pair_item, pair_user, pair_time = item[by_bidder], user[by_bidder], time[by_bidder]
+    new_pair = np.ones(len(by_bidder), dtype=bool)
+    new_pair[1:] = (pair_item[1:] != pair_item[:-1]) | (pair_user[1:] != pair_user[:-1])
+    pair_starts = np.flatnonzero(new_pair)
+    pair_ends = np.append(pair_starts[1:], len(by_bidder)) - 1
+    bidder_items = pair_item[pair_starts]
+    distinct_bidders = np.searchsorted(bidder_items, item_ids, side='right') - \
+        np.searchsorted(bidder_items, item_ids, side='left')
+
+    event_item = np.concatenate([bidder_items, bidder_items])
+    event_time = np.concatenate([pair_time[pair_starts], pair_time[pair_ends]])
+    event_delta = np.concatenate([np.ones(len(pair_starts), 'i8'), -np.ones(len(pair_starts), 'i8')])
+    # Joins sort before leaves at the same instant so a single-bid bidder still counts
+    order = np.lexsort((-event_delta, event_time, event_item))
+    # Every item's events sum to zero, so a global running sum restarts at 0 per item
+    engaged = np.cumsum(event_delta[order])
+    event_starts = np.searchsorted(event_item[order], item_ids, side='left')
+    peak_concurrency = np.maximum.reduceat(engaged, event_starts)
+
+    hours = duration / 3600
+    velocity = np.divide(counts, hours, out=np.zeros(len(counts)), where=hours > 0)
+    final_price = np.maximum.reduceat(amount, starts)
+
+    return {
+        int(item_ids[i]): {
+            'bid_count': int(counts[i]),
+            'distinct_bidders': int(distinct_bidders[i]),
+            'final_price': float(final_price[i]),
+            'first_bid_at': float(first_time[i]),
+            'last_bid_at': float(last_time[i]),
+            'bidding_duration_seconds': float(duration[i]),
+            'bids_per_hour': float(velocity[i]),
+            'peak_bids_per_hour': int(peak_window[i]),
+            'peak_concurrent_bidders': int(peak_concurrency[i]),
+        }
+        for i in range(len(item_ids))
+    }
+
+
+def item_stats():
+    """Metrics for every item, read from snapshots for closed items"""
+    items = list(Item.objects.values_list('pk', 'title', 'is_active', 'starting_price', 'created_at'))
+    stats = _snapshots(STATS)
+
+    missing = [pk for pk, *_ in items if pk not in stats]
+    if missing:
+        computed = compute_stats(load_bids(missing))
+        results = {}
+        for pk, title, is_active, starting_price, created_at in items:
+            if pk in stats:
+                continue
+            metrics = computed.get(pk) or _empty_stats(starting_price)
+            first_bid_at, last_bid_at = metrics.pop('first_bid_at'), metrics.pop('last_bid_at')
+            row = {
+                'item': pk,
+                'title': title,
+                'is_active': is_active,
+                'starting_price': float(starting_price),
+                **metrics,
+                'price_lift': metrics['final_price'] / float(starting_price),
+                'first_bid_at': _isoformat(first_bid_at),
+                'last_bid_at': _isoformat(last_bid_at),
+                'time_to_first_bid_seconds': (
+                    first_bid_at - created_at.timestamp() if first_bid_at is not None else None
+                ),
+            }
+            stats[pk] = row
+            if not is_active:
+                results[pk] = row
+        _store(STATS, results)
+    return [stats[pk] for pk, *_ in items]
+
+
+def _isoformat(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _empty_stats(starting_price):
+    return {
+        'bid_count': 0, 'distinct_bidders': 0, 'final_price': float(starting_price),
+        'first_bid_at': None, 'last_bid_at': None, 'bidding_duration_seconds': 0.0,
+        'bids_per_hour': 0.0, 'peak_bids_per_hour': 0, 'peak_concurrent_bidders': 0,
+    }
+
+
+def summarize(stats):
+    """Distribution of bidding duration (first to last bid) across closed items"""
+    durations = np.array([
+        row['bidding_duration_seconds'] for row in stats if not row['is_active'] and row['bid_count']
+    ])
+    if not len(durations):
+        return {'closed_items': 0}
+    p50, p90 = np.percentile(durations, [50, 90])
+    return {
+        'closed_items': int(len(durations)),
+        'duration_mean_seconds': float(durations.mean()),
+        'duration_p50_seconds': float(p50),
+        'duration_p90_seconds': float(p90),
+        'duration_max_seconds': float(durations.max()),
+    }
+
+
+def price_curve(item, points=200):
+    """(seconds since first bid, amount) pairs for an item, downsampled to ``points``"""
+    kind = _curve_kind(points)
+    if not item.is_active:
+        stored = _snapshots(kind, [item.pk])
+        if item.pk in stored:
+            return stored[item.pk]
+    bids = load_bids([item.pk])
+    if len(bids) > points:
+        # Evenly spaced samples, always keeping the first and final bid
+        bids = bids[np.unique(np.linspace(0, len(bids) - 1, points).round().astype('i8'))]
+    offsets = bids['time'] - bids['time'][0] if len(bids) else bids['time']
+    curve = [[float(t), float(a)] for t, a in zip(offsets, bids['amount'])]
+    if not item.is_active:
+        _store(kind, {item.pk: curve})
+    return curve
@@ -0,0 +1,107 @@
+"""Archival of closed auctions' bids.
+
+Bids of items that have been closed for a while are moved, whole item at a
+time, from ``Bid`` into ``ArchivedBid`` so the live table only holds bids the
+hot paths need. Rows are copied with ``INSERT ... SELECT`` in chunks, each in
+its own short transaction holding the item's row lock. Reading code treats a
+closed item's archived bids as its bid history (see ``Item.get_highest_bid``
+and ``ItemBidHistoryView``), and reopening an item moves its bids back before
+it accepts bids again (see ``reopen_item``).
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import AnalyticsSnapshot, ArchivedBid, Bid, Item, PendingOutbid
+
+BID_COLUMNS = ('id', 'item_id', 'user_id', 'bid_amount', 'bid_time')
+
+
+def archivable_items(days):
+    """Ids of closed items whose last live bid is older than ``days``"""
+    cutoff = timezone.now() - timedelta(days=days)
+    last_bid = Bid.objects.filter(item=OuterRef('pk')).order_by('-bid_time').values('bid_time')[:1]
+    return (
+        Item.objects.filter(is_active=False)
+        .annotate(last_bid_time=Subquery(last_bid))
+        .filter(last_bid_time__lt=cutoff)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+def archive_item_bids(item_id, batch_size=1000):
+    """Move a closed item's bids to the archive, returning how many were moved"""
+    return _move_item_bids(item_id, Bid, ArchivedBid, batch_size, is_active=False)
+
+
+def restore_item_bids(item_id, batch_size=1000):
+    """Move an item's archived bids back to the live table, e.g. when it is reopened"""
+    return _move_item_bids(item_id, ArchivedBid, Bid, batch_size)
+
+
+def reopen_item(item_id, batch_size=1000):
+    """Restore a closed item's archived bids, then mark it active.
+
+    The item stays closed while its bids are moved back, so bid validation
+    never sees a reopened item without its history. The flag is flipped under
+    the item's row lock, after moving back anything archived in the meantime,
+    and the item's analytics snapshots are dropped in the same transaction.
+    """
+    restore_item_bids(item_id, batch_size)
+    with transaction.atomic():
+        Item.objects.select_for_update().filter(pk=item_id).exists()
+        restore_item_bids(item_id, batch_size)
+        Item.objects.filter(pk=item_id).update(is_active=True)
+        AnalyticsSnapshot.objects.filter(item_id=item_id).delete()
+
+
+def _move_item_bids(item_id, source, target, batch_size, **item_filter):
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # Re-check the item under its row lock so a reopen can't race a chunk
+            if not Item.objects.select_for_update().filter(pk=item_id, **item_filter).exists():
+                break
+            ids = list(
+                source.objects.filter(item_id=item_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            _copy_rows(source, target, ids)
+            if source is Bid:
+                PendingOutbid.objects.filter(bid_id__in=ids).delete()
+            _delete_rows(source, ids)
+        moved += len(ids)
+    return moved
+
+
+def _copy_rows(source, target, ids):
+    qn = connection.ops.quote_name
+    columns = [qn(column) for column in BID_COLUMNS]
+    insert_columns = list(columns)
+    select_columns = list(columns)
+    params = []
+    if target is ArchivedBid:
+        insert_columns.append(qn('archived_at'))
+        select_columns.append('%s')
+        params.append(timezone.now())
+    params.extend(ids)
+    sql = (
+        f"INSERT INTO {qn(target._meta.db_table)} ({', '.join(insert_columns)}) "
+        f"SELECT {', '.join(select_columns)} FROM {qn(source._meta.db_table)} "
+        f"WHERE {qn('id')} IN ({', '.join(['%s'] * len(ids))})"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _delete_rows(model, ids):
+    # A plain DELETE: QuerySet.delete() would first load every row of the chunk
+    # to collect the PendingOutbid cascade, which the caller has already handled
+    qn = connection.ops.quote_name
+    sql = f"DELETE FROM {qn(model._meta.db_table)} WHERE {qn('id')} IN ({', '.join(['%s'] * len(ids))})"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, ids)
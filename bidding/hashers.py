@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the work factor taken from BIDDING_PASSWORD_ITERATIONS.
+
+    Keeps the ``pbkdf2_sha256`` algorithm name, so existing hashes still
+    verify. Hashes made with a different iteration count are rewritten on the
+    user's next successful login through Django's ``must_update`` check.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'BIDDING_PASSWORD_ITERATIONS', PBKDF2PasswordHasher.iterations)
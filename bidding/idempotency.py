@@ -0,0 +1,99 @@
+"""Idempotency keys for bid placement.
+
+A client sends an ``Idempotency-Key`` header with ``POST /api/bids/`` and
+reuses it when it retries. The first successful response is saved in the
+same transaction as the bid and then kept in the cache, so a retry is
+answered from the cache (or, once evicted, from the ``IdempotencyKey``
+table) without validating the bid again or touching the Bid table.
+Failed requests are not saved and can simply be retried.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+CACHE_PREFIX = 'bidding:idempotency'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+class Replay(Exception):
+    """Raised when a request turns out to be a retry of a saved one"""
+
+    def __init__(self, stored):
+        super().__init__(stored['key'])
+        self.stored = stored
+
+
+def get_ttl():
+    return getattr(settings, 'BIDDING_IDEMPOTENCY_TTL', timedelta(hours=24))
+
+
+def _cache_key(user_id, key):
+    # Hashed so any header value makes a valid cache key
+    return f'{CACHE_PREFIX}:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def fingerprint(data):
+    """Digest of a request body, to tell a retry from a different request reusing its key"""
+    if hasattr(data, 'dict'):
+        data = data.dict()
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def lookup(user_id, key, use_cache=True):
+    """The saved response for ``key`` as a dict, or None if it is unknown or expired"""
+    if use_cache:
+        stored = cache.get(_cache_key(user_id, key))
+        if stored is not None:
+            return stored
+    now = timezone.now()
+    row = (
+        IdempotencyKey.objects
+        .filter(user_id=user_id, key=key, created_at__gte=now - get_ttl())
+        .values('key', 'fingerprint', 'status_code', 'response', 'created_at')
+        .first()
+    )
+    if row is None:
+        return None
+    # Cache only for the row's remaining lifetime, so the key expires on schedule
+    expires_at = row.pop('created_at') + get_ttl()
+    if use_cache:
+        cache.set(_cache_key(user_id, key), row, (expires_at - now).total_seconds())
+    return row
+
+
+def save(user_id, key, request_fingerprint, status_code, response):
+    """Save a response inside the current transaction; it is cached once that commits.
+
+    An expired key is taken over rather than raising an integrity error.
+    """
+    IdempotencyKey.objects.filter(
+        user_id=user_id, key=key, created_at__lt=timezone.now() - get_ttl()
+    ).delete()
+    stored = {
+        'key': key, 'fingerprint': request_fingerprint,
+        'status_code': status_code, 'response': response,
+    }
+    IdempotencyKey.objects.create(user_id=user_id, **stored)
+    transaction.on_commit(
+        lambda: cache.set(_cache_key(user_id, key), stored, get_ttl().total_seconds())
+    )
+
+
+def purge_expired(batch_size=1000):
+    """Delete keys older than the TTL and return how many were removed"""
+    cutoff = timezone.now() - get_ttl()
+    total = 0
+    while True:
+        pks = list(
+            IdempotencyKey.objects.filter(created_at__lt=cutoff).values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return total
+        total += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,46 @@
+"""In-process lock striping for bid placement.
+
+Bids on the same item must be checked and written one at a time, but bids on
+different items should not wait for each other. ``item_locks(item_id)`` maps
+an item to one of a fixed set of FIFO locks; the view holds it around the
+transaction that takes the item's row lock, so a hot item only queues its own
+bidders (and the few items sharing its stripe).
+"""
+import threading
+
+from django.conf import settings
+
+
+class FairLock:
+    """Ticket lock: waiters acquire it in the order they arrived"""
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._next_ticket = 0
+        self._now_serving = 0
+
+    def __enter__(self):
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._now_serving:
+                self._condition.wait()
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._condition:
+            self._now_serving += 1
+            self._condition.notify_all()
+
+
+class StripedLock:
+    """Fixed-size map of keys to FairLocks"""
+
+    def __init__(self, stripes=64):
+        self._locks = [FairLock() for _ in range(stripes)]
+
+    def __call__(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+
+item_locks = StripedLock(getattr(settings, 'BIDDING_LOCK_STRIPES', 64))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from bidding.archive import archivable_items, archive_item_bids
+
+
+class Command(BaseCommand):
+    help = 'Move bids of auctions closed more than --days ago into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Archive closed items whose last bid is older than this many days')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Bids moved per transaction')
+
+    def handle(self, *args, **options):
+        items = total = 0
+        for item_id in archivable_items(options['days']).iterator():
+            moved = archive_item_bids(item_id, batch_size=options['batch_size'])
+            if moved:
+                items += 1
+                total += moved
+                self.stdout.write(f'Item {item_id}: archived {moved} bids')
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} bids from {items} items'))
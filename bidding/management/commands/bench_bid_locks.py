@@ -0,0 +1,133 @@
+import statistics
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from bidding import views
+from bidding.locks import FairLock, StripedLock
+from bidding.models import Item, User
+
+
+class Command(BaseCommand):
+    help = ('Compare bid placement throughput per item under one global lock and under item lock '
+            'striping, posting real bids for one hot item and many cold ones')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent bidders')
+        parser.add_argument('--cold-items', type=int, default=50, help='Number of cold items')
+        parser.add_argument('--hot-share', type=float, default=0.5,
+                            help='Fraction of bidders hammering the hot item')
+        parser.add_argument('--duration', type=float, default=3.0, help='Seconds per run')
+        parser.add_argument('--stripes', type=int, default=64, help='Stripes for the striped run')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes every write transaction on its database lock, so striping cannot '
+                'help here; point DATABASE_URL at PostgreSQL for meaningful numbers'
+            ))
+        # Created for real (not in a rolled-back transaction) because bids are placed on other threads
+        password = make_password(None)
+        admin = User.objects.create(username='bench_bid_admin', role='admin', password=password)
+        users = User.objects.bulk_create(
+            User(username=f'bench_bidder{n}', role='player', password=password)
+            for n in range(options['threads'])
+        )
+        items = Item.objects.bulk_create(
+            Item(title=f'Bench item {n}', description='', starting_price=Decimal('1'), created_by=admin)
+            for n in range(1 + options['cold_items'])
+        )
+        # Every attempt bids more than any earlier one on the item, so only
+        # bids overtaken while waiting for the item's lock are rejected
+        self.amounts = {item.pk: count(2) for item in items}
+        global_lock = FairLock()
+        runs = [
+            ('global lock', lambda item_id: global_lock),
+            (f'striped ({options["stripes"]})', StripedLock(options['stripes'])),
+        ]
+        try:
+            for label, lock_for in runs:
+                with mock.patch.object(views, 'item_locks', lock_for):
+                    results = self.run(users, items, options)
+                self.report(label, results, items, options['duration'])
+        finally:
+            Item.objects.filter(pk__in=[item.pk for item in items]).delete()
+            User.objects.filter(pk__in=[admin.pk] + [user.pk for user in users]).delete()
+
+    def run(self, users, items, options):
+        """Post bids through BidListCreateView from one thread per user; return outcomes per item"""
+        view = views.BidListCreateView.as_view()
+        factory = APIRequestFactory()
+        hot, cold = items[0], items[1:]
+        hot_bidders = int(len(users) * options['hot_share'])
+        results = {item.pk: Counter() for item in items}
+        results_lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def bidder(worker, user):
+            local = {}
+            n = worker
+            try:
+                while time.perf_counter() < deadline:
+                    n += 1
+                    # Hot bidders all target the hot item; the rest cycle over the cold items
+                    item = hot if worker < hot_bidders else cold[n % len(cold)]
+                    request = factory.post(
+                        '/api/bids/', {'item': item.pk, 'bid_amount': str(next(self.amounts[item.pk]))},
+                        format='json',
+                    )
+                    force_authenticate(request, user)
+                    try:
+                        status_code = view(request).status_code
+                    except DatabaseError:
+                        status_code = None
+                    outcome = {201: 'accepted', 400: 'rejected'}.get(status_code, 'errors')
+                    local.setdefault(item.pk, Counter())[outcome] += 1
+            finally:
+                connection.close()
+            with results_lock:
+                for item_id, outcomes in local.items():
+                    results[item_id].update(outcomes)
+
+        threads = [threading.Thread(target=bidder, args=(n, user)) for n, user in enumerate(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def report(self, label, results, items, duration):
+        def rate(item):
+            return results[item.pk]['accepted'] / duration
+
+        hot, cold = items[0], items[1:]
+        totals = sum(results.values(), Counter())
+        cold_rates = sorted(rate(item) for item in cold)
+        self.stdout.write(
+            f'{label}: {totals["accepted"] / duration:,.0f} bids/s accepted | '
+            f'{totals["rejected"]} outbid while waiting | {totals["errors"]} errors'
+        )
+        self.stdout.write(
+            f'  hot item: {rate(hot):,.1f} bids/s ({results[hot.pk]["rejected"]} outbid, '
+            f'{results[hot.pk]["errors"]} errors)'
+        )
+        self.stdout.write(
+            f'  cold items: min {cold_rates[0]:,.1f} | median {statistics.median(cold_rates):,.1f} | '
+            f'max {cold_rates[-1]:,.1f} bids/s per item'
+        )
+        if self.verbosity > 1:
+            for item in cold:
+                outcomes = results[item.pk]
+                self.stdout.write(
+                    f'    item {item.pk}: {rate(item):,.1f} bids/s '
+                    f'({outcomes["rejected"]} outbid, {outcomes["errors"]} errors)'
+                )
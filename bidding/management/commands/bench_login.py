@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory
+
+from bidding.models import User
+from bidding.serializers import LoginSerializer
+from bidding.views import LoginView
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput: serial logins (the old sync view under ASGI) versus the async login view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=40, help='Logins per run')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent requests to the async view')
+        parser.add_argument('--users', type=int, default=20, help='Benchmark users to log in as')
+
+    def handle(self, *args, **options):
+        password = 'bench-password'
+        # Created for real (not in a rolled-back transaction) because logins run on other threads
+        encoded = make_password(password)
+        users = User.objects.bulk_create(
+            User(username=f'bench_login{n}', password=encoded) for n in range(options['users'])
+        )
+        credentials = [{'username': user.username, 'password': password} for user in users]
+        logins = options['logins']
+        self.stdout.write(
+            f'PBKDF2 iterations: {settings.BIDDING_PASSWORD_ITERATIONS:,} | '
+            f'login workers: {settings.BIDDING_LOGIN_WORKERS}'
+        )
+        try:
+            start = time.perf_counter()
+            for n in range(logins):
+                assert LoginSerializer(data=credentials[n % len(credentials)]).is_valid()
+            serial = time.perf_counter() - start
+            self.stdout.write(f'serial: {logins / serial:,.1f} logins/s')
+
+            start = time.perf_counter()
+            async_to_sync(self.run_async)(credentials, logins, options['concurrency'])
+            concurrent = time.perf_counter() - start
+            self.stdout.write(
+                f'async view (concurrency {options["concurrency"]}): {logins / concurrent:,.1f} logins/s'
+            )
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    async def run_async(self, credentials, logins, concurrency):
+        factory = AsyncRequestFactory()
+        view = LoginView.as_view()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login(n):
+            async with semaphore:
+                request = factory.post('/api/auth/login/', json.dumps(credentials[n % len(credentials)]),
+                                       content_type='application/json')
+                response = await view(request)
+                assert response.status_code == 200, response.content
+
+        await asyncio.gather(*(login(n) for n in range(logins)))
@@ -0,0 +1,68 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bidding.models import User, Item, Bid
+from bidding.serializers import (
+    ItemSerializer, BidHistorySerializer, ItemRowSerializer, BidHistoryRowSerializer
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of the model serializers and the row serializers on a large bid history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bids', type=int, default=100000, help='Bids in the benchmarked history')
+        parser.add_argument('--items', type=int, default=1000, help='Items in the benchmarked item list')
+        parser.add_argument('--bidders', type=int, default=50, help='Distinct bidders')
+
+    def handle(self, *args, **options):
+        # Everything is created inside a transaction that is rolled back at the end
+        with transaction.atomic():
+            item, items = self.populate(options['bids'], options['items'], options['bidders'])
+
+            bids = Bid.objects.filter(item=item).order_by('-bid_time')
+            self.report('bid history', options['bids'],
+                        lambda: BidHistorySerializer(bids.select_related('user'), many=True).data,
+                        lambda: BidHistoryRowSerializer(bids).data)
+            self.report('item list', len(items),
+                        lambda: ItemSerializer(Item.objects.all(), many=True).data,
+                        lambda: ItemRowSerializer(Item.objects.all()).data)
+
+            transaction.set_rollback(True)
+
+    def populate(self, bid_total, item_total, bidder_total):
+        admin = User.objects.create(username='bench_admin', role='admin')
+        bidders = User.objects.bulk_create(
+            User(username=f'bench_bidder{i}') for i in range(bidder_total)
+        )
+        items = Item.objects.bulk_create(
+            Item(title=f'Bench item {i}', description='Benchmark', starting_price=Decimal('1.00'),
+                 created_by=admin)
+            for i in range(item_total)
+        )
+        hot = items[0]
+        Bid.objects.bulk_create(
+            (Bid(item=hot, user=bidders[i % bidder_total], bid_amount=Decimal(i + 2) / 100)
+             for i in range(bid_total)),
+            batch_size=5000,
+        )
+        return hot, items
+
+    def report(self, label, rows, baseline, fast):
+        baseline_time = self.timed(baseline)
+        fast_time = self.timed(fast)
+        self.stdout.write(
+            f'{label}: {rows} rows | '
+            f'serializer {rows / baseline_time:,.0f} rows/s | '
+            f'row serializer {rows / fast_time:,.0f} rows/s | '
+            f'{baseline_time / fast_time:.1f}x'
+        )
+
+    @staticmethod
+    def timed(fn):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
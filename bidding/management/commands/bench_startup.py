@@ -0,0 +1,120 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bidding.models import User
+
+# Runs in a fresh interpreter: set up Django, build the WSGI app and serve one
+# authenticated request (access token in argv[1]), as production traffic is
+FIRST_REQUEST_PROBE = '''
+import io, json, sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+setup = time.perf_counter()
+statuses = []
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/items/', 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'HTTP_AUTHORIZATION': f'Bearer {sys.argv[1]}',
+    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+    'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+b''.join(application(environ, lambda status, headers: statuses.append(status)))
+done = time.perf_counter()
+print(json.dumps({'setup': setup - start, 'first_request': done - setup, 'status': statuses[0]}))
+'''
+
+IMPORT_PROBE = 'import django; django.setup(); import {urlconf}'
+
+
+class Command(BaseCommand):
+    help = ('Measure worker cold start per settings profile: -X importtime summary and time to first request. '
+            'Fails when --max-import-ms or --max-first-request-ms is exceeded.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=['bidwars.settings', 'bidwars.settings_api'],
+                            help='Settings modules to measure')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per profile; medians are reported')
+        parser.add_argument('--top', type=int, default=8, help='Packages listed in the import summary')
+        parser.add_argument('--max-import-ms', type=float, help='Fail if median total import time exceeds this')
+        parser.add_argument('--max-first-request-ms', type=float,
+                            help='Fail if median cold start to first response exceeds this')
+
+    def handle(self, *args, **options):
+        # The probe lists items as this user, so the view, serializer and database all run
+        user = User.objects.create(username='bench_startup_user', password=make_password(None))
+        try:
+            self.token = str(AccessToken.for_user(user))
+            self.measure(options)
+        finally:
+            user.delete()
+
+    def measure(self, options):
+        failures = []
+        for profile in options['profiles']:
+            imports = [self.import_times(profile) for _ in range(options['repeat'])]
+            runs = [self.first_request(profile) for _ in range(options['repeat'])]
+
+            import_ms = statistics.median(sum(run.values()) for run in imports) / 1000
+            wall_ms = statistics.median(run['wall'] for run in runs) * 1000
+            setup_ms = statistics.median(run['setup'] for run in runs) * 1000
+            request_ms = statistics.median(run['first_request'] for run in runs) * 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(profile))
+            self.stdout.write(
+                f'  imports {import_ms:.0f} ms | setup {setup_ms:.0f} ms | first request {request_ms:.0f} ms '
+                f'(HTTP {runs[0]["status"]}) | process start to first response {wall_ms:.0f} ms'
+            )
+            for package, micros in imports[0].most_common(options['top']):
+                self.stdout.write(f'    {package:<30} {micros / 1000:7.1f} ms')
+
+            if options['max_import_ms'] is not None and import_ms > options['max_import_ms']:
+                failures.append(f'{profile}: imports {import_ms:.0f} ms > {options["max_import_ms"]:.0f} ms')
+            if options['max_first_request_ms'] is not None and wall_ms > options['max_first_request_ms']:
+                failures.append(
+                    f'{profile}: first response {wall_ms:.0f} ms > {options["max_first_request_ms"]:.0f} ms'
+                )
+        if failures:
+            raise CommandError('Startup regression: ' + '; '.join(failures))
+
+    def run_probe(self, profile, args):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        return subprocess.run(
+            [sys.executable, *args], env=env, cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        )
+
+    def import_times(self, profile):
+        """Self import time in microseconds, summed per top-level package"""
+        urlconf = self.urlconf(profile)
+        result = self.run_probe(profile, ['-X', 'importtime', '-c', IMPORT_PROBE.format(urlconf=urlconf)])
+        totals = Counter()
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            own, _, name = line[len('import time:'):].split('|')
+            totals[name.strip().split('.')[0]] += int(own)
+        return totals
+
+    def first_request(self, profile):
+        start = time.perf_counter()
+        result = self.run_probe(profile, ['-c', FIRST_REQUEST_PROBE, self.token])
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        if not timings['status'].startswith('200'):
+            raise CommandError(f'{profile}: first request returned HTTP {timings["status"]}, expected 200')
+        timings['wall'] = time.perf_counter() - start
+        return timings
+
+    def urlconf(self, profile):
+        result = self.run_probe(profile, ['-c', 'from django.conf import settings; print(settings.ROOT_URLCONF)'])
+        return result.stdout.strip()
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bidding.notifications import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Deliver outbid notifications queued by bid placement'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Queued bids handled per batch')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending(batch_size=options['batch_size'])
+            if processed:
+                self.stdout.write(f'Processed {processed} queued bids')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
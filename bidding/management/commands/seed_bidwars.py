@@ -0,0 +1,159 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from bidding.models import User, Item, Bid
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the timestamps we generate instead of auto_now_add's"""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Generate deterministic users, items and bids for scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--bids', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=42, help='Same seed and sizes give the same data')
+        parser.add_argument('--closed', type=float, default=0.2, help='Fraction of items that are closed')
+        parser.add_argument('--days', type=int, default=60, help='Spread auctions over this many past days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed', help='Prefix for generated usernames')
+        parser.add_argument('--password', default='player123', help='Password shared by all generated users')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['items'] < 1:
+            raise CommandError('--users and --items must be at least 1')
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Users prefixed "{prefix}_" already exist; pick another --prefix')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.start = timezone.now() - timedelta(days=options['days'])
+        self.span = timedelta(days=options['days']).total_seconds()
+
+        # Hashing is the expensive part of creating users, so do it once
+        password = make_password(options['password'])
+        admin = User.objects.create(
+            username=f'{prefix}_admin', email=f'{prefix}_admin@bidwars.com',
+            role='admin', is_staff=True, password=password,
+        )
+        user_ids = self.insert('users', User, options['users'], (
+            User(username=f'{prefix}_user{n}', email=f'{prefix}_user{n}@bidwars.com',
+                 role='player', password=password)
+            for n in range(options['users'])
+        ))
+        item_starts = [
+            (self.rng.randint(100, 100000), self.rng.uniform(0, self.span))
+            for _ in range(options['items'])
+        ]
+        # Closed auctions ended at a random point after they started; open ones run until now
+        closed = sorted(self.rng.sample(range(options['items']), int(options['items'] * options['closed'])))
+        item_ends = [self.span] * options['items']
+        for n in closed:
+            item_ends[n] = self.rng.uniform(item_starts[n][1], self.span)
+        with explicit_timestamps(Item._meta.get_field('created_at')):
+            item_ids = self.insert('items', Item, options['items'], (
+                Item(title=f'{prefix.title()} item {n}', description=f'Generated item {n}',
+                     starting_price=Decimal(cents) / 100, created_by=admin,
+                     created_at=self.start + timedelta(seconds=offset))
+                for n, (cents, offset) in enumerate(item_starts)
+            ))
+        self.insert_bids(
+            options['bids'], self.generate_bids(item_ids, item_starts, item_ends, user_ids, options['bids'])
+        )
+
+        closed = [item_ids[n] for n in closed]
+        for n in range(0, len(closed), self.batch_size):
+            Item.objects.filter(pk__in=closed[n:n + self.batch_size]).update(is_active=False)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(user_ids)} users, {len(item_ids)} items ({len(closed)} closed), '
+            f'{options["bids"]} bids'
+        ))
+
+    def generate_bids(self, item_ids, item_starts, item_ends, user_ids, total):
+        """Yield (item, user, amount, time) rows with strictly increasing amounts per item.
+
+        Each item's bids fall between its start and end offsets, so none is
+        later than now and closed items have no bids after they ended.
+        """
+        random = self.rng.random
+        adapt_amount = connection.ops.adapt_decimalfield_value
+        adapt_time = connection.ops.adapt_datetimefield_value
+        # Walk bid times as naive UTC so adapting each row doesn't convert timezones
+        start = timezone.make_naive(self.start, dt_timezone.utc)
+        users = len(user_ids)
+        per_item, extra = divmod(total, len(item_ids))
+        for n, (item_id, (cents, offset), end) in enumerate(zip(item_ids, item_starts, item_ends)):
+            count = per_item + (n < extra)
+            leader = None
+            for seconds in sorted(offset + random() * (end - offset) for _ in range(count)):
+                cents += 1 + int(random() * 500)
+                bidder = int(random() * users)
+                if bidder == leader:
+                    # Nobody outbids themselves
+                    bidder = (bidder + 1) % users
+                leader = bidder
+                bid_time = start + timedelta(seconds=seconds)
+                yield (item_id, user_ids[bidder], adapt_amount(Decimal(cents) / 100), adapt_time(bid_time))
+
+    def insert(self, label, model, total, objects):
+        """bulk_create ``objects`` in batches, reporting progress, and return the new pks"""
+        pks = []
+        for batch in self.batches(label, total, objects):
+            pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        return pks
+
+    def insert_bids(self, total, rows, rows_per_statement=500):
+        """Insert pre-adapted bid rows with raw INSERTs, skipping model instantiation"""
+        qn = connection.ops.quote_name
+        columns = ', '.join(qn(column) for column in ('item_id', 'user_id', 'bid_amount', 'bid_time'))
+        prefix = f'INSERT INTO {qn(Bid._meta.db_table)} ({columns}) VALUES '
+        for batch in self.batches('bids', total, rows):
+            with connection.cursor() as cursor:
+                if connection.vendor == 'sqlite':
+                    # In-process, so executemany has no round trips to save
+                    cursor.executemany(prefix + '(%s, %s, %s, %s)', batch)
+                    continue
+                # Elsewhere executemany costs a round trip per row; send multi-row statements
+                for n in range(0, len(batch), rows_per_statement):
+                    chunk = batch[n:n + rows_per_statement]
+                    cursor.execute(
+                        prefix + ', '.join(['(%s, %s, %s, %s)'] * len(chunk)),
+                        [value for row in chunk for value in row],
+                    )
+
+    def batches(self, label, total, rows):
+        """Yield lists of ``batch_size`` rows, each inside its own transaction, reporting progress"""
+        done = 0
+        started = time.perf_counter()
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                yield batch
+            done += len(batch)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'\r{label}: {done}/{total} ({done / elapsed:,.0f}/s)', ending='')
+            self.stdout.flush()
+        self.stdout.write('')
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding', '0005_outbid_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBid',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('bid_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('bid_time', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bids', to='bidding.item')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bids', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-bid_time'],
+                'indexes': [models.Index(fields=['item', 'bid_time'], name='bidding_arc_item_id_77c99e_idx')],
+            },
+        ),
+    ]
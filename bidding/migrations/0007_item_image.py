@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding', '0006_archivedbid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='image',
+            field=models.ImageField(blank=True, upload_to='items/'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='thumbnail',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='PendingThumbnail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pending_thumbnail', to='bidding.item')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
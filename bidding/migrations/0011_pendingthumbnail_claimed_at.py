@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding', '0010_analyticssnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingthumbnail',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -33,6 +33,9 @@ class Item(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_items')
+    image = models.ImageField(upload_to='items/', blank=True)
+    # SHA-256 of the generated thumbnail, which is stored under that name (see bidding/thumbnails.py)
+    thumbnail = models.CharField(max_length=64, blank=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
@@ -40,16 +43,30 @@ class Item(models.Model):
     def __str__(self):
         return self.title
 
+    def get_highest_bid(self):
+        """Get the highest bid, reading archived bids for closed items"""
+        highest_bid = self.bids.order_by('-bid_amount').first()
+        if highest_bid is None and not self.is_active:
+            highest_bid = self.archived_bids.order_by('-bid_amount').first()
+        return highest_bid
+
+    def get_bid_count(self):
+        """Count bids, including archived bids for closed items"""
+        count = self.bids.count()
+        if not self.is_active:
+            count += self.archived_bids.count()
+        return count
+
     @property
     def current_highest_bid(self):
         """Get the current highest bid for this item"""
-        highest_bid = self.bids.order_by('-bid_amount').first()
+        highest_bid = self.get_highest_bid()
         return highest_bid.bid_amount if highest_bid else self.starting_price
 
     @property
     def current_highest_bidder(self):
         """Get the current highest bidder for this item"""
-        highest_bid = self.bids.order_by('-bid_amount').first()
+        highest_bid = self.get_highest_bid()
         return highest_bid.user if highest_bid else None
 
 
@@ -86,3 +103,109 @@ class Bid(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+class WatchlistEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='watchlist')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='watchers')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['user', 'item']
+
+    def __str__(self):
+        return f"{self.user.username} watching {self.item.title}"
+
+
+class ArchivedBid(models.Model):
+    """Bid moved out of the live table after its auction closed (see bidding/archive.py)"""
+    id = models.BigIntegerField(primary_key=True)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='archived_bids')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bids')
+    bid_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    bid_time = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-bid_time']
+        indexes = [models.Index(fields=['item', 'bid_time'])]
+
+    def __str__(self):
+        return f"{self.user.username} bid ₹{self.bid_amount} on {self.item.title} (archived)"
+
+
+class AnalyticsSnapshot(models.Model):
+    """Analytics computed for a closed item and shared by all workers (see bidding/analytics.py).
+
+    ``kind`` is ``'stats'`` or ``'curve:<points>'``. Reopening an item deletes
+    its snapshots.
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='analytics_snapshots')
+    kind = models.CharField(max_length=20)
+    data = models.JSONField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['item', 'kind']
+
+    def __str__(self):
+        return f"{self.kind} for {self.item.title}"
+
+
+class OutbidNotification(models.Model):
+    """In-app notice that a user's leading bid on an item was beaten.
+
+    Repeated outbids on the same item within the dedup window update a single
+    row instead of creating new ones.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='outbid_notifications')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='outbid_notifications')
+    bid_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    outbid_count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [models.Index(fields=['user', 'item', 'is_read'])]
+
+    def __str__(self):
+        return f"{self.user.username} outbid on {self.item.title} (₹{self.bid_amount})"
+
+
+class IdempotencyKey(models.Model):
+    """Response of a request made with an Idempotency-Key header, replayed on retries"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ['user', 'key']
+
+    def __str__(self):
+        return f"{self.user.username}: {self.key}"
+
+
+class PendingOutbid(models.Model):
+    """Queue of accepted bids waiting for the notification worker"""
+    bid = models.OneToOneField(Bid, on_delete=models.CASCADE, related_name='pending_outbid')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+
+class PendingThumbnail(models.Model):
+    """Queue of uploaded item images waiting for the thumbnail worker"""
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, related_name='pending_thumbnail')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set while a worker renders the item, so other workers skip it
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
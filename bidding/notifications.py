@@ -0,0 +1,122 @@
+"""Outbid notifications.
+
+Placing a bid only enqueues a ``PendingOutbid`` row. The ``process_outbids``
+worker drains the queue in batches, works out whose lead was beaten, writes
+or refreshes ``OutbidNotification`` rows, which clients read from the API,
+and optionally sends one email per user per batch.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Bid, Item, OutbidNotification, PendingOutbid, User
+
+
+def get_dedup_window():
+    return getattr(settings, 'BIDDING_OUTBID_DEDUP_WINDOW', timedelta(minutes=5))
+
+
+def enqueue_outbid(bid):
+    """Queue an accepted bid for outbid processing"""
+    PendingOutbid.objects.create(bid=bid)
+
+
+def process_pending(batch_size=500, window=None):
+    """Process one batch of queued bids and return how many were taken off the queue"""
+    window = get_dedup_window() if window is None else window
+    with transaction.atomic():
+        pending = list(
+            PendingOutbid.objects.select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', 'bid_id')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        # The displaced leader is whoever held the highest bid below the new one
+        displaced = Bid.objects.filter(
+            item=OuterRef('item'), bid_amount__lt=OuterRef('bid_amount')
+        ).order_by('-bid_amount')
+        bids = (
+            Bid.objects.filter(id__in=[bid_id for _, bid_id in pending])
+            .annotate(displaced_user=Subquery(displaced.values('user')[:1]))
+            .order_by('bid_amount')
+            .values_list('item_id', 'user_id', 'bid_amount', 'displaced_user')
+        )
+        outbids = {}
+        for item_id, user_id, bid_amount, displaced_user in bids:
+            if displaced_user is None or displaced_user == user_id:
+                continue
+            amount, count = outbids.get((displaced_user, item_id), (bid_amount, 0))
+            outbids[(displaced_user, item_id)] = (max(amount, bid_amount), count + 1)
+
+        notifications = save_notifications(outbids, window)
+        PendingOutbid.objects.filter(id__in=[pk for pk, _ in pending]).delete()
+        transaction.on_commit(lambda: deliver(notifications))
+    return len(pending)
+
+
+def save_notifications(outbids, window):
+    """Create notification rows, folding outbids into unread rows newer than ``window``"""
+    if not outbids:
+        return []
+    now = timezone.now()
+    recent = OutbidNotification.objects.filter(
+        is_read=False,
+        updated_at__gte=now - window,
+        user_id__in={user_id for user_id, _ in outbids},
+        item_id__in={item_id for _, item_id in outbids},
+    )
+    existing = {(n.user_id, n.item_id): n for n in recent}
+
+    updated, created = [], []
+    for key, (amount, count) in outbids.items():
+        notification = existing.get(key)
+        if notification:
+            notification.bid_amount = max(notification.bid_amount, amount)
+            notification.outbid_count += count
+            notification.updated_at = now
+            updated.append(notification)
+        else:
+            created.append(OutbidNotification(
+                user_id=key[0], item_id=key[1], bid_amount=amount, outbid_count=count
+            ))
+    OutbidNotification.objects.bulk_update(updated, ['bid_amount', 'outbid_count', 'updated_at'])
+    OutbidNotification.objects.bulk_create(created)
+    return updated + created
+
+
+def deliver(notifications):
+    """Send one email per user, if enabled"""
+    if not notifications or not getattr(settings, 'BIDDING_OUTBID_EMAIL', False):
+        return
+    by_user = {}
+    for notification in notifications:
+        by_user.setdefault(notification.user_id, []).append(notification)
+    send_emails(by_user)
+
+
+def send_emails(by_user):
+    users = User.objects.filter(id__in=by_user).exclude(email='').in_bulk()
+    titles = dict(
+        Item.objects.filter(
+            id__in={n.item_id for notifications in by_user.values() for n in notifications}
+        ).values_list('id', 'title')
+    )
+    messages = []
+    for user_id, notifications in by_user.items():
+        user = users.get(user_id)
+        if not user:
+            continue
+        lines = [f"{titles.get(n.item_id, 'An item')}: new highest bid ₹{n.bid_amount}" for n in notifications]
+        messages.append((
+            "You've been outbid on Bid Wars",
+            "\n".join(lines),
+            settings.DEFAULT_FROM_EMAIL,
+            [user.email],
+        ))
+    send_mass_mail(messages, fail_silently=True)
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import User, Item, Bid
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import User, Item, Bid, ArchivedBid, OutbidNotification, WatchlistEntry
+from .thumbnails import thumbnail_url
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -29,10 +32,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         if validated_data.get('role') == 'admin':
             if not request or not request.user.is_authenticated or request.user.role != 'admin':
                 validated_data['role'] = 'player'
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        # create_user hashes the password once; don't set it again
+        return User.objects.create_user(password=password, **validated_data)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -67,12 +68,13 @@ class ItemSerializer(serializers.ModelSerializer):
     created_by = serializers.StringRelatedField(read_only=True)
     bid_count = serializers.SerializerMethodField()
     max_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Item
         fields = ('id', 'title', 'description', 'starting_price', 'max_amount', 'created_at', 
                  'is_active', 'created_by', 'current_highest_bid', 
-                 'current_highest_bidder', 'bid_count')
+                 'current_highest_bidder', 'bid_count', 'thumbnail_url')
         read_only_fields = ('created_at', 'created_by')
 
     def get_current_highest_bidder(self, obj):
@@ -80,7 +82,18 @@ class ItemSerializer(serializers.ModelSerializer):
         return bidder.username if bidder else None
 
     def get_bid_count(self, obj):
-        return obj.bids.count()
+        return obj.get_bid_count()
+
+    def get_thumbnail_url(self, obj):
+        return thumbnail_url(obj.thumbnail)
+
+
+class ItemImageSerializer(serializers.ModelSerializer):
+    image = serializers.ImageField(write_only=True)
+
+    class Meta:
+        model = Item
+        fields = ('image',)
 
 
 class BidSerializer(serializers.ModelSerializer):
@@ -121,4 +134,169 @@ class BidHistorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Bid
-        fields = ('id', 'user', 'bid_amount', 'bid_time')
\ No newline at end of file
+        fields = ('id', 'user', 'bid_amount', 'bid_time')
+
+
+
+class MyAuctionSerializer(serializers.Serializer):
+    """One row per item the user has bid on, built from MyAuctionsView's grouped query"""
+    item = serializers.IntegerField()
+    item_title = serializers.CharField()
+    is_active = serializers.BooleanField()
+    my_highest_bid = serializers.DecimalField(max_digits=10, decimal_places=2)
+    my_bid_count = serializers.IntegerField()
+    current_highest_bid = serializers.DecimalField(max_digits=10, decimal_places=2)
+    is_winning = serializers.BooleanField()
+    last_activity = serializers.DateTimeField()
+
+
+class OutbidNotificationSerializer(serializers.ModelSerializer):
+    item_title = serializers.CharField(source='item.title', read_only=True)
+
+    class Meta:
+        model = OutbidNotification
+        fields = ('id', 'item', 'item_title', 'bid_amount', 'outbid_count', 'is_read',
+                  'created_at', 'updated_at')
+        read_only_fields = fields
+
+
+class WatchlistEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WatchlistEntry
+        fields = ('item', 'created_at')
+        read_only_fields = ('created_at',)
+
+
+# Shared field instances used by the row serializers below. They render values
+# exactly like the fields DRF builds for the model serializers above.
+_amount_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+_datetime_field = serializers.DateTimeField()
+
+
+def _user_label(username, role):
+    # Mirrors User.__str__, which StringRelatedField uses
+    return f"{username} ({role})"
+
+
+class BidHistoryRowSerializer:
+    """Read-only fast path for BidHistorySerializer.
+
+    Works on ``values_list`` tuples instead of model instances and produces
+    the same representation, for listing large bid histories.
+    """
+    columns = ('id', 'user__username', 'user__role', 'bid_amount', 'bid_time')
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @property
+    def data(self):
+        amount = _amount_field.to_representation
+        timestamp = _datetime_field.to_representation
+        return [
+            {
+                'id': pk,
+                'user': _user_label(username, role),
+                'bid_amount': amount(bid_amount),
+                'bid_time': timestamp(bid_time),
+            }
+            for pk, username, role, bid_amount, bid_time
+            in self.queryset.values_list(*self.columns)
+        ]
+
+
+class ItemRowSerializer:
+    """Read-only fast path for listing items with ItemSerializer's output.
+
+    The highest bid, highest bidder and bid count are annotated onto the
+    queryset so the whole list is fetched in a single query. Archived bids
+    are included the same way as in ``Item.get_highest_bid``.
+    """
+    columns = (
+        'id', 'title', 'description', 'starting_price', 'max_amount', 'created_at',
+        'is_active', 'created_by__username', 'created_by__role',
+        'highest_bid_amount', 'highest_bidder', 'total_bids', 'thumbnail',
+    )
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def get_queryset(self):
+        live = self._bid_subqueries(Bid)
+        archived = self._bid_subqueries(ArchivedBid)
+        return self.queryset.annotate(
+            highest_bid_amount=Coalesce(live['amount'], archived['amount']),
+            highest_bidder=Coalesce(live['bidder'], archived['bidder']),
+            total_bids=Coalesce(live['count'], 0) + Coalesce(archived['count'], 0),
+        )
+
+    @staticmethod
+    def _bid_subqueries(model):
+        item_bids = model.objects.filter(item=OuterRef('pk'))
+        highest = item_bids.order_by('-bid_amount')
+        bid_count = item_bids.order_by().values('item').annotate(total=Count('pk')).values('total')
+        return {
+            'amount': Subquery(highest.values('bid_amount')[:1]),
+            'bidder': Subquery(highest.values('user__username')[:1]),
+            'time': Subquery(highest.values('bid_time')[:1]),
+            'count': Subquery(bid_count, output_field=IntegerField()),
+        }
+
+    @property
+    def data(self):
+        amount = _amount_field.to_representation
+        timestamp = _datetime_field.to_representation
+        return [
+            {
+                'id': pk,
+                'title': title,
+                'description': description,
+                'starting_price': amount(starting_price),
+                'max_amount': amount(max_amount) if max_amount is not None else None,
+                'created_at': timestamp(created_at),
+                'is_active': is_active,
+                'created_by': _user_label(creator, creator_role),
+                'current_highest_bid': highest_bid if highest_bid is not None else starting_price,
+                'current_highest_bidder': highest_bidder,
+                'bid_count': bid_count,
+                'thumbnail_url': thumbnail_url(thumbnail),
+            }
+            for (pk, title, description, starting_price, max_amount, created_at,
+                 is_active, creator, creator_role, highest_bid, highest_bidder, bid_count, thumbnail)
+            in self.get_queryset().values_list(*self.columns)
+        ]
+
+
+class HighestBidRowSerializer:
+    """Current highest bid of many items at once, in the shape of get_current_highest_bid.
+
+    Uses the same annotations as ItemRowSerializer, so any number of items
+    costs a single query.
+    """
+    columns = ('id', 'starting_price', 'highest_bid_amount', 'highest_bidder', 'highest_bid_time')
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def get_queryset(self):
+        live = ItemRowSerializer._bid_subqueries(Bid)
+        archived = ItemRowSerializer._bid_subqueries(ArchivedBid)
+        return self.queryset.annotate(
+            highest_bid_amount=Coalesce(live['amount'], archived['amount']),
+            highest_bidder=Coalesce(live['bidder'], archived['bidder']),
+            highest_bid_time=Coalesce(live['time'], archived['time']),
+        )
+
+    @property
+    def data(self):
+        timestamp = _datetime_field.to_representation
+        return [
+            {
+                'item': pk,
+                'current_highest_bid': float(highest_bid if highest_bid is not None else starting_price),
+                'current_highest_bidder': highest_bidder,
+                'bid_time': timestamp(bid_time) if bid_time is not None else None,
+            }
+            for pk, starting_price, highest_bid, highest_bidder, bid_time
+            in self.get_queryset().values_list(*self.columns)
+        ]
@@ -1,3 +1,785 @@
-from django.test import TestCase
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import archive
+from .archive import archivable_items, archive_item_bids
+from .hashers import ConfigurablePBKDF2PasswordHasher
+from . import idempotency, thumbnails
+from .models import (
+    User, Item, Bid, ArchivedBid, OutbidNotification, PendingOutbid, PendingThumbnail,
+    WatchlistEntry, IdempotencyKey, AnalyticsSnapshot
+)
+from .locks import FairLock, StripedLock
+from .notifications import enqueue_outbid, process_pending
+from .serializers import (
+    ItemSerializer, BidHistorySerializer, BidSerializer, ItemRowSerializer, BidHistoryRowSerializer
+)
+
+
+# Test users don't need the production hasher's 1,000,000 PBKDF2 iterations;
+# PasswordHashingTests covers that hasher
+FAST_PASSWORD_HASHERS = override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+
+
+def create_users():
+    """An admin and two players, alice and bob"""
+    return (
+        User.objects.create_user(username='admin', password='pw', role='admin'),
+        User.objects.create_user(username='alice', password='pw'),
+        User.objects.create_user(username='bob', password='pw'),
+    )
+
+
+@FAST_PASSWORD_HASHERS
+class BidWarsTestCase(TestCase):
+    """Shared fixture: the users from create_users() and an active item created by the admin"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.alice, cls.bob = create_users()
+        cls.item = Item.objects.create(
+            title='Guitar', description='', starting_price=Decimal('100'), created_by=cls.admin,
+        )
+
+
+class RowSerializerParityTests(BidWarsTestCase):
+    """The row serializers must render byte-identical JSON to the model serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.guitar = cls.item
+        cls.painting = Item.objects.create(
+            title='Painting', description='Oil on canvas', starting_price=Decimal('200.5'),
+            max_amount=Decimal('1000'), created_by=cls.admin,
+        )
+        cls.empty = Item.objects.create(
+            title='Lamp', description='', starting_price=Decimal('10'), created_by=cls.admin,
+        )
+        for user, amount in [(cls.alice, '550.00'), (cls.bob, '600.10'), (cls.alice, '650')]:
+            Bid.objects.create(item=cls.guitar, user=user, bid_amount=Decimal(amount))
+        Bid.objects.create(item=cls.painting, user=cls.bob, bid_amount=Decimal('250.00'))
+        Item.objects.filter(pk=cls.painting.pk).update(is_active=False)
+
+    def assertSameJSON(self, expected, actual):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(expected), renderer.render(actual))
+
+    def test_item_list_parity(self):
+        items = Item.objects.all()
+        self.assertSameJSON(ItemSerializer(items, many=True).data, ItemRowSerializer(items).data)
+
+    def test_filtered_item_list_parity(self):
+        items = Item.objects.filter(is_active=True)
+        self.assertSameJSON(ItemSerializer(items, many=True).data, ItemRowSerializer(items).data)
+
+    def test_bid_history_parity(self):
+        for item in Item.objects.all():
+            bids = Bid.objects.filter(item=item).order_by('-bid_time')
+            self.assertSameJSON(
+                BidHistorySerializer(bids, many=True).data, BidHistoryRowSerializer(bids).data
+            )
+
+    def test_item_list_runs_single_query(self):
+        with self.assertNumQueries(1):
+            ItemRowSerializer(Item.objects.all()).data
+
+
+class MyAuctionsViewTests(BidWarsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.guitar = cls.item
+        cls.lamp = Item.objects.create(
+            title='Lamp', description='', starting_price=Decimal('10'), created_by=cls.admin,
+        )
+        Bid.objects.create(item=cls.guitar, user=cls.alice, bid_amount=Decimal('110'))
+        Bid.objects.create(item=cls.guitar, user=cls.bob, bid_amount=Decimal('120'))
+        Bid.objects.create(item=cls.lamp, user=cls.bob, bid_amount=Decimal('11'))
+        Bid.objects.create(item=cls.lamp, user=cls.alice, bid_amount=Decimal('12'))
+        Bid.objects.create(item=cls.lamp, user=cls.alice, bid_amount=Decimal('15'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_one_row_per_item_with_status(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/me/auctions/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['item']: row for row in response.json()}
+        self.assertEqual(set(rows), {self.guitar.pk, self.lamp.pk})
+        self.assertEqual(rows[self.guitar.pk]['my_highest_bid'], '110.00')
+        self.assertEqual(rows[self.guitar.pk]['current_highest_bid'], '120.00')
+        self.assertFalse(rows[self.guitar.pk]['is_winning'])
+        self.assertEqual(rows[self.lamp.pk]['my_bid_count'], 2)
+        self.assertTrue(rows[self.lamp.pk]['is_winning'])
+
+    def test_since_returns_only_changed_items(self):
+        latest = Bid.objects.filter(item=self.lamp).order_by('-bid_time').first().bid_time
+        response = self.client.get('/api/me/auctions/', {'since': latest.isoformat()})
+        self.assertEqual(response.json(), [])
+        Bid.objects.create(item=self.guitar, user=self.bob, bid_amount=Decimal('130'))
+        response = self.client.get('/api/me/auctions/', {'since': latest.isoformat()})
+        self.assertEqual([row['item'] for row in response.json()], [self.guitar.pk])
+
+    def test_invalid_since(self):
+        response = self.client.get('/api/me/auctions/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class WatchlistTests(BidWarsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.items = [
+            Item.objects.create(title=f'Item {n}', description='', starting_price=Decimal('10'),
+                                created_by=cls.admin)
+            for n in range(5)
+        ]
+        for n, item in enumerate(cls.items[:3]):
+            Bid.objects.create(item=item, user=cls.alice, bid_amount=Decimal(20 + n))
+            Bid.objects.create(item=item, user=cls.bob, bid_amount=Decimal(30 + n))
+        closed = cls.items[2]
+        Item.objects.filter(pk=closed.pk).update(is_active=False)
+        archive_item_bids(closed.pk)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_highest_bids_match_single_item_endpoint(self):
+        ids = [item.pk for item in self.items]
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/items/highest-bids/', {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual([row.pop('item') for row in rows], ids)
+        for item, row in zip(self.items, rows):
+            self.assertEqual(row, self.client.get(f'/api/items/{item.pk}/highest-bid/').json())
+        self.assertEqual(rows[2]['current_highest_bidder'], 'bob')
+        self.assertIsNone(rows[4]['current_highest_bidder'])
+
+    def test_highest_bids_rejects_bad_ids(self):
+        for ids in ['', '1,x', ','.join(['1'] * 101)]:
+            response = self.client.get('/api/items/highest-bids/', {'ids': ids})
+            self.assertEqual(response.status_code, 400)
+
+    def test_watchlist_round_trip(self):
+        for item in self.items[:3]:
+            self.assertEqual(self.client.post('/api/me/watchlist/', {'item': item.pk}).status_code, 201)
+        # Watching twice is harmless
+        self.client.post('/api/me/watchlist/', {'item': self.items[0].pk})
+        self.assertEqual(WatchlistEntry.objects.filter(user=self.alice).count(), 3)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/me/watchlist/')
+        rows = response.json()
+        self.assertEqual([row['id'] for row in rows], [item.pk for item in reversed(self.items[:3])])
+        self.assertEqual(rows[0]['current_highest_bid'], 32.0)
+        self.assertEqual(rows[0]['bid_count'], 2)
+
+        self.assertEqual(self.client.delete(f'/api/me/watchlist/{self.items[0].pk}/').status_code, 204)
+        self.assertEqual(self.client.delete(f'/api/me/watchlist/{self.items[0].pk}/').status_code, 404)
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.get('/api/me/watchlist/').json(), [])
+
+
+class OutbidNotificationTests(BidWarsTestCase):
+    def place_bid(self, user, amount):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/api/bids/', {'item': self.item.pk, 'bid_amount': amount})
+        self.assertEqual(response.status_code, 201)
+
+    def test_bid_only_enqueues(self):
+        self.place_bid(self.alice, '110')
+        self.place_bid(self.bob, '120')
+        self.assertEqual(PendingOutbid.objects.count(), 2)
+        self.assertFalse(OutbidNotification.objects.exists())
+
+    def test_worker_notifies_displaced_leader_and_dedups(self):
+        self.place_bid(self.alice, '110')
+        self.place_bid(self.bob, '120')
+        self.place_bid(self.alice, '130')
+        self.place_bid(self.bob, '140')
+        self.place_bid(self.bob, '150')
+        with self.captureOnCommitCallbacks(execute=True):
+            process_pending()
+        self.assertFalse(PendingOutbid.objects.exists())
+        alice = OutbidNotification.objects.get(user=self.alice)
+        self.assertEqual((alice.outbid_count, alice.bid_amount), (2, Decimal('140')))
+        bob = OutbidNotification.objects.get(user=self.bob)
+        self.assertEqual(bob.outbid_count, 1)
+
+        self.place_bid(self.alice, '160')
+        with self.captureOnCommitCallbacks(execute=True):
+            process_pending()
+        self.assertEqual(OutbidNotification.objects.filter(user=self.bob).count(), 1)
+        self.assertEqual(OutbidNotification.objects.get(user=self.bob).outbid_count, 2)
+
+    def test_worker_emails_each_outbid_user_once(self):
+        User.objects.filter(pk=self.alice.pk).update(email='alice@example.com')
+        self.place_bid(self.alice, '110')
+        self.place_bid(self.bob, '120')
+        self.place_bid(self.alice, '130')
+        self.place_bid(self.bob, '140')
+        with self.captureOnCommitCallbacks(execute=True):
+            process_pending()
+        self.assertEqual(mail.outbox, [])
+
+        self.place_bid(self.alice, '150')
+        self.place_bid(self.bob, '160')
+        with self.settings(BIDDING_OUTBID_EMAIL=True), self.captureOnCommitCallbacks(execute=True):
+            process_pending()
+        self.assertEqual([message.to for message in mail.outbox], [['alice@example.com']])
+        self.assertIn('Guitar: new highest bid', mail.outbox[0].body)
+
+
+class IdempotentBidTests(BidWarsTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def bid(self, amount, key='retry-me'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/bids/', {'item': self.item.pk, 'bid_amount': amount},
+                                    HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_original_response(self):
+        first = self.bid('110')
+        self.assertEqual(first.status_code, 201)
+        # Served from the cache without touching the database
+        with self.assertNumQueries(0):
+            retry = self.bid('110')
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Bid.objects.count(), 1)
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            retry = self.bid('110')
+        self.assertEqual(retry.json(), first.json())
+
+    def test_retry_waiting_on_item_lock_does_not_bid_again(self):
+        first = self.bid('110')
+        cache.clear()
+        real_lookup = idempotency.lookup
+        calls = []
+
+        def racing_lookup(*args, **kwargs):
+            calls.append(args)
+            return None if len(calls) == 1 else real_lookup(*args, **kwargs)
+
+        # The retry was checked and validated before the original committed,
+        # then queued on the item lock
+        with mock.patch.object(idempotency, 'lookup', racing_lookup), \
+                mock.patch.object(BidSerializer, 'validate_bid_amount', lambda self, value: value):
+            retry = self.bid('110')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+        self.assertEqual(Bid.objects.count(), 1)
+
+    def test_cache_refill_keeps_original_expiry(self):
+        self.bid('110')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(hours=23, minutes=59))
+        cache.clear()
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.assertEqual(self.bid('110').status_code, 201)
+        timeout = cache_set.call_args.args[2]
+        self.assertTrue(0 < timeout <= 60, timeout)
+
+    def test_key_reused_for_different_request(self):
+        self.bid('110')
+        self.assertEqual(self.bid('120').status_code, 422)
+        self.assertEqual(self.bid('120', key='another').status_code, 201)
+        self.assertEqual(Bid.objects.count(), 2)
+
+    def test_failed_requests_are_not_saved(self):
+        self.assertEqual(self.bid('90').status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.bid('110', key='x' * 256).status_code, 400)
+
+    def test_expired_keys_are_reused_and_purged(self):
+        self.bid('110')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        cache.clear()
+        self.assertEqual(self.bid('120').status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get().response['bid_amount'], '120.00')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'needs row locks that block other connections')
+@FAST_PASSWORD_HASHERS
+class ConcurrentIdempotentBidTests(TransactionTestCase):
+    """A retry handled by another worker while the original's transaction is still open"""
+
+    def setUp(self):
+        cache.clear()
+        admin, self.alice, _ = create_users()
+        self.item = Item.objects.create(
+            title='Guitar', description='', starting_price=Decimal('100'), created_by=admin,
+        )
+
+    def post_bid(self, responses):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        try:
+            responses.append(client.post('/api/bids/', {'item': self.item.pk, 'bid_amount': '110'},
+                                         HTTP_IDEMPOTENCY_KEY='retry-me'))
+        finally:
+            connection.close()
+
+    def wait_for(self, condition):
+        for _ in range(500):
+            if condition():
+                return
+            time.sleep(0.01)
+        self.fail('timed out')
+
+    def test_retry_waits_for_original_and_replays(self):
+        in_transaction, release = threading.Event(), threading.Event()
+        real_enqueue = enqueue_outbid
+
+        def enqueue_and_hold(bid):
+            real_enqueue(bid)
+            if not in_transaction.is_set():
+                in_transaction.set()
+                release.wait(5)
+
+        def blocked_on_row_lock():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM pg_locks WHERE NOT granted')
+                return cursor.fetchone()[0] > 0
+
+        first, retry = [], []
+        # Workers don't share the in-process stripe locks, only the database
+        with mock.patch('bidding.views.item_locks', lambda item_id: nullcontext()), \
+                mock.patch('bidding.views.enqueue_outbid', enqueue_and_hold):
+            original = threading.Thread(target=self.post_bid, args=(first,))
+            original.start()
+            self.assertTrue(in_transaction.wait(5))
+            duplicate = threading.Thread(target=self.post_bid, args=(retry,))
+            duplicate.start()
+            self.wait_for(blocked_on_row_lock)
+            release.set()
+            original.join()
+            duplicate.join()
+
+        self.assertEqual(first[0].status_code, 201)
+        self.assertEqual((retry[0].status_code, retry[0].json()), (201, first[0].json()))
+        self.assertEqual(Bid.objects.count(), 1)
+
+
+class ItemLockTests(SimpleTestCase):
+    def test_same_item_shares_a_lock(self):
+        locks = StripedLock(8)
+        self.assertIs(locks(42), locks(42))
+        self.assertIsNot(locks(1), locks(2))
+
+    def test_fair_lock_serves_in_arrival_order(self):
+        lock = FairLock()
+        order = []
+        threads = []
+        with lock:
+            for i in range(5):
+                thread = threading.Thread(target=lambda i=i: self.hold(lock, order, i))
+                thread.start()
+                threads.append(thread)
+                time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, list(range(5)))
+
+    @staticmethod
+    def hold(lock, order, i):
+        with lock:
+            order.append(i)
+
+
+class BidArchiveTests(BidWarsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for user, amount in [(cls.alice, '110'), (cls.bob, '120'), (cls.alice, '130')]:
+            Bid.objects.create(item=cls.item, user=user, bid_amount=Decimal(amount))
+        Item.objects.filter(pk=cls.item.pk).update(is_active=False)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_archive_keeps_closed_item_readable(self):
+        history = self.client.get(f'/api/items/{self.item.pk}/bids/').json()
+        items = self.client.get('/api/items/').json()
+        detail = self.client.get(f'/api/items/{self.item.pk}/').json()
+
+        self.assertEqual(list(archivable_items(days=-1)), [self.item.pk])
+        self.assertEqual(archive_item_bids(self.item.pk, batch_size=2), 3)
+        self.assertFalse(Bid.objects.exists())
+        self.assertEqual(ArchivedBid.objects.count(), 3)
+
+        self.assertEqual(self.client.get(f'/api/items/{self.item.pk}/bids/').json(), history)
+        self.assertEqual(self.client.get('/api/items/').json(), items)
+        self.assertEqual(self.client.get(f'/api/items/{self.item.pk}/').json(), detail)
+        self.assertEqual(detail['bid_count'], 3)
+        self.assertEqual(detail['current_highest_bidder'], 'alice')
+
+    def test_history_of_partly_archived_item(self):
+        history = self.client.get(f'/api/items/{self.item.pk}/bids/').json()
+        # An archive run interrupted after its first chunk
+        oldest = Bid.objects.order_by('id').values_list('id', flat=True)[:1]
+        archive._copy_rows(Bid, ArchivedBid, list(oldest))
+        Bid.objects.filter(id__in=list(oldest)).delete()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/items/{self.item.pk}/bids/')
+        self.assertEqual(response.json(), history)
+        self.assertEqual(len(history), 3)
+
+    def test_archived_bids_stay_in_player_views(self):
+        self.client.force_authenticate(self.alice)
+        auctions = self.client.get('/api/me/auctions/').json()
+        my_bids = self.client.get('/api/bids/').json()
+        item_bids = self.client.get('/api/bids/', {'item_id': self.item.pk}).json()
+
+        archive_item_bids(self.item.pk)
+        self.assertEqual(self.client.get('/api/me/auctions/').json(), auctions)
+        self.assertEqual(self.client.get('/api/bids/').json(), my_bids)
+        self.assertEqual(self.client.get('/api/bids/', {'item_id': self.item.pk}).json(), item_bids)
+        self.assertEqual(len(auctions), 1)
+        self.assertEqual((auctions[0]['my_bid_count'], auctions[0]['is_winning']), (2, True))
+        self.assertEqual(len(item_bids), 3)
+
+    def test_archive_deletes_without_loading_bids(self):
+        enqueue_outbid(Bid.objects.first())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(archive_item_bids(self.item.pk, batch_size=2), 3)
+        self.assertFalse(PendingOutbid.objects.exists())
+        loads = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'bid_amount' in q['sql']]
+        self.assertEqual(loads, [])
+
+    def test_recent_or_active_items_are_not_archived(self):
+        self.assertEqual(list(archivable_items(days=30)), [])
+        Item.objects.filter(pk=self.item.pk).update(is_active=True)
+        self.assertEqual(archive_item_bids(self.item.pk), 0)
+
+    def test_reopening_restores_bids(self):
+        archive_item_bids(self.item.pk)
+        response = self.client.post(f'/api/items/{self.item.pk}/toggle-status/')
+        self.assertTrue(response.json()['is_active'])
+        self.assertEqual(Bid.objects.filter(item=self.item).count(), 3)
+        self.assertFalse(ArchivedBid.objects.exists())
+        self.assertEqual(self.item.current_highest_bid, Decimal('130'))
+
+    def test_item_stays_closed_until_bids_are_restored(self):
+        archive_item_bids(self.item.pk)
+        move_item_bids = archive._move_item_bids
+        seen_active = []
+
+        def tracking_move(*args, **kwargs):
+            seen_active.append(Item.objects.get(pk=self.item.pk).is_active)
+            return move_item_bids(*args, **kwargs)
+
+        with mock.patch.object(archive, '_move_item_bids', tracking_move):
+            response = self.client.patch(f'/api/items/{self.item.pk}/', {'is_active': True})
+        self.assertTrue(response.json()['is_active'])
+        self.assertTrue(seen_active)
+        self.assertNotIn(True, seen_active)
+        self.assertEqual(Bid.objects.filter(item=self.item).count(), 3)
+        self.assertFalse(ArchivedBid.objects.exists())
+
+    def test_editing_an_open_item_does_not_reopen_it(self):
+        Item.objects.filter(pk=self.item.pk).update(is_active=True)
+        with mock.patch('bidding.views.reopen_item') as reopen_item:
+            self.client.patch(f'/api/items/{self.item.pk}/', {'title': 'Bass'})
+            self.client.patch(f'/api/items/{self.item.pk}/', {'is_active': True})
+        reopen_item.assert_not_called()
+
+
+@FAST_PASSWORD_HASHERS
+class SeedCommandTests(TestCase):
+    def test_seeds_increasing_bid_sequences(self):
+        call_command('seed_bidwars', users=5, items=3, bids=40, seed=1, batch_size=7, stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='seed_user').count(), 5)
+        self.assertEqual(Bid.objects.count(), 40)
+        for item in Item.objects.all():
+            bids = list(item.bids.order_by('bid_time'))
+            amounts = [bid.bid_amount for bid in bids]
+            self.assertEqual(amounts, sorted(set(amounts)))
+            self.assertGreater(amounts[0], item.starting_price)
+            self.assertTrue(all(a.user_id != b.user_id for a, b in zip(bids, bids[1:])))
+        self.assertTrue(User.objects.get(username='seed_user0').check_password('player123'))
+
+    def test_bid_times_fall_within_each_auction(self):
+        before = timezone.now()
+        call_command('seed_bidwars', users=20, items=30, bids=3000, seed=2, days=3, closed=0.5,
+                     stdout=StringIO())
+        self.assertFalse(Bid.objects.filter(bid_time__gt=timezone.now()).exists())
+        self.assertEqual(Item.objects.filter(is_active=False).count(), 15)
+        for item in Item.objects.all():
+            first, last = item.bids.order_by('bid_time')[::item.bids.count() - 1]
+            self.assertGreaterEqual(first.bid_time, item.created_at)
+            self.assertGreater(before, last.bid_time)
+        # Closed items are the ones whose bidding ended, not the first ones created
+        closed = set(Item.objects.filter(is_active=False).values_list('pk', flat=True))
+        self.assertNotEqual(closed, set(Item.objects.order_by('pk').values_list('pk', flat=True)[:15]))
+
+
+@override_settings(BIDDING_PASSWORD_ITERATIONS=1000)
+class PasswordHashingTests(TransactionTestCase):
+    def test_registration_hashes_once(self):
+        with mock.patch.object(ConfigurablePBKDF2PasswordHasher, 'encode',
+                               autospec=True, side_effect=ConfigurablePBKDF2PasswordHasher.encode) as encode:
+            response = APIClient().post('/api/auth/register/', {
+                'username': 'carol', 'email': 'carol@example.com', 'password': 's3cret-pass',
+                'password_confirm': 's3cret-pass', 'role': 'player',
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(encode.call_count, 1)
+        self.assertTrue(User.objects.get(username='carol').check_password('s3cret-pass'))
+
+    def test_async_login(self):
+        User.objects.create_user(username='carol', password='s3cret-pass')
+        response = self.client.post('/api/auth/login/', {'username': 'carol', 'password': 's3cret-pass'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['username'], 'carol')
+        self.assertIn('access', response.json())
+
+        response = self.client.post('/api/auth/login/', {'username': 'carol', 'password': 'wrong'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['Invalid credentials']})
+
+    def test_login_rehashes_to_configured_iterations(self):
+        with self.settings(BIDDING_PASSWORD_ITERATIONS=500):
+            user = User.objects.create_user(username='carol', password='s3cret-pass')
+        self.assertIn('$500$', user.password)
+        response = self.client.post('/api/auth/login/', {'username': 'carol', 'password': 's3cret-pass'})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertIn('$1000$', user.password)
+
+
+class ItemThumbnailTests(BidWarsTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def upload(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), 'red').save(buffer, format='PNG')
+        upload = SimpleUploadedFile('guitar.png', buffer.getvalue(), content_type='image/png')
+        return self.client.post(f'/api/items/{self.item.pk}/image/', {'image': upload}, format='multipart')
+
+    def test_upload_renders_thumbnail_in_worker(self):
+        self.assertEqual(self.upload().status_code, 202)
+        self.assertIsNone(self.client.get(f'/api/items/{self.item.pk}/').json()['thumbnail_url'])
+
+        thumbnails.process_pending()
+        self.item.refresh_from_db()
+        self.assertFalse(PendingThumbnail.objects.exists())
+        with Image.open(thumbnails.thumbnail_path(self.item.thumbnail)) as image:
+            self.assertEqual(image.size, (320, 213))
+        listed = self.client.get('/api/items/').json()[0]
+        self.assertEqual(listed['thumbnail_url'], f'/api/thumbnails/{self.item.thumbnail}.jpg')
+        self.assertNotIn('image', listed)
+
+    def test_worker_renders_outside_transactions(self):
+        self.upload()
+        depth = len(connection.atomic_blocks)
+        render = thumbnails.render_thumbnail
+        render_depths = []
+
+        def tracking_render(*args, **kwargs):
+            render_depths.append(len(connection.atomic_blocks))
+            # A second worker meanwhile skips the claimed item
+            self.assertEqual(thumbnails.process_pending(), 0)
+            return render(*args, **kwargs)
+
+        with mock.patch.object(thumbnails, 'render_thumbnail', tracking_render):
+            self.assertEqual(thumbnails.process_pending(), 1)
+        self.assertEqual(render_depths, [depth])
+        self.assertFalse(PendingThumbnail.objects.exists())
+
+    def test_stale_claims_are_retried(self):
+        self.upload()
+        PendingThumbnail.objects.update(claimed_at=timezone.now() - thumbnails.CLAIM_TIMEOUT * 2)
+        self.assertEqual(thumbnails.process_pending(), 1)
+        self.item.refresh_from_db()
+        self.assertTrue(self.item.thumbnail)
+
+    def test_thumbnail_serving(self):
+        self.upload()
+        thumbnails.process_pending()
+        self.item.refresh_from_db()
+        url = thumbnails.thumbnail_url(self.item.thumbnail)
+        size = thumbnails.thumbnail_path(self.item.thumbnail).stat().st_size
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(len(b''.join(response.streaming_content)), size)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        partial = self.client.get(url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 0-9/{size}')
+        self.assertEqual(len(partial.content), 10)
+
+        self.assertEqual(self.client.get(url, HTTP_RANGE=f'bytes={size}-').status_code, 416)
+        # A last byte before the first is invalid, not unsatisfiable: the whole file is served
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=5-3').status_code, 200)
+        self.assertEqual(self.client.get('/api/thumbnails/' + '0' * 64 + '.jpg').status_code, 404)
+
+
+class AnalyticsTests(BidWarsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command('seed_bidwars', users=6, items=5, bids=60, seed=3, closed=0.4, stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def expected(self, item):
+        """Per-item reference computation with plain Python"""
+        bids = sorted(list(item.bids.all()) + list(item.archived_bids.all()), key=lambda b: b.bid_time)
+        times = [b.bid_time.timestamp() for b in bids]
+        spans = {}
+        for bid, t in zip(bids, times):
+            first, last = spans.get(bid.user_id, (t, t))
+            spans[bid.user_id] = (min(first, t), max(last, t))
+        return {
+            'bid_count': len(bids),
+            'distinct_bidders': len(spans),
+            'final_price': float(max(b.bid_amount for b in bids)),
+            'peak_bids_per_hour': max(sum(1 for u in times if t - 3600 <= u <= t) for t in times),
+            'peak_concurrent_bidders': max(
+                sum(1 for first, last in spans.values() if first <= t <= last) for t in times
+            ),
+        }
+
+    def test_vectorized_stats_match_reference(self):
+        archive_item_bids(Item.objects.filter(is_active=False).first().pk)
+        response = self.client.get('/api/analytics/items/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['item']: row for row in response.json()['items']}
+        for item in Item.objects.filter(title__startswith='Seed'):
+            row = rows[item.pk]
+            for key, value in self.expected(item).items():
+                self.assertAlmostEqual(row[key], value, msg=f'{key} for item {item.pk}')
+        self.assertEqual(response.json()['summary']['closed_items'], 2)
+
+    def item_rows(self):
+        return {row['item']: row for row in self.client.get('/api/analytics/items/').json()['items']}
+
+    def test_closed_items_are_stored_until_reopened(self):
+        closed = Item.objects.filter(is_active=False).first()
+        self.client.get(f'/api/analytics/items/{closed.pk}/curve/')
+        self.item_rows()
+        self.assertEqual(AnalyticsSnapshot.objects.filter(item=closed).count(), 2)
+        self.assertFalse(AnalyticsSnapshot.objects.filter(item__is_active=True).exists())
+        Bid.objects.filter(item=closed).delete()
+        # Snapshots live in the database, so a cold cache (another worker) still uses them
+        cache.clear()
+        self.assertGreater(self.item_rows()[closed.pk]['bid_count'], 0)
+
+        self.client.post(f'/api/items/{closed.pk}/toggle-status/')
+        self.assertFalse(AnalyticsSnapshot.objects.filter(item=closed).exists())
+        self.assertEqual(self.item_rows()[closed.pk]['bid_count'], 0)
+
+    def test_snapshots_expire(self):
+        closed = Item.objects.filter(is_active=False).first()
+        self.item_rows()
+        Bid.objects.filter(item=closed).delete()
+        AnalyticsSnapshot.objects.update(computed_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.item_rows()[closed.pk]['bid_count'], 0)
+
+    def test_price_curve(self):
+        item = Item.objects.filter(title__startswith='Seed').first()
+        response = self.client.get(f'/api/analytics/items/{item.pk}/curve/', {'points': 50})
+        points = response.json()['points']
+        self.assertEqual(len(points), 12)
+        self.assertEqual(points[0][0], 0)
+        self.assertEqual(points[-1][1], float(item.current_highest_bid))
+        self.assertEqual(self.client.get(f'/api/analytics/items/{item.pk}/curve/', {'points': 7}).status_code, 400)
+
+    def test_admin_only(self):
+        player = User.objects.get(username='seed_user0')
+        self.client.force_authenticate(player)
+        self.assertEqual(self.client.get('/api/analytics/items/').status_code, 403)
+
+
+class StartupTests(SimpleTestCase):
+    def run_python(self, code, settings_module='bidwars.settings_api'):
+        # Without DATABASE_URL, as set to run the suite against PostgreSQL, which
+        # makes the settings import dj_database_url
+        env = {key: value for key, value in os.environ.items() if key != 'DATABASE_URL'}
+        return subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR, env={**env, 'DJANGO_SETTINGS_MODULE': settings_module},
+        ).stdout
+
+    def test_worker_startup_skips_heavy_imports(self):
+        modules = ['numpy', 'PIL', 'channels', 'dj_database_url']
+        # A local .env is loaded with python-dotenv, so only check it when there is none
+        if not (settings.BASE_DIR / '.env').exists():
+            modules.append('dotenv')
+        loaded = self.run_python(
+            'import sys, django; django.setup(); import bidwars.urls; '
+            f'print(sorted(m for m in {modules!r} if m in sys.modules))'
+        )
+        self.assertEqual(loaded.strip(), '[]')
+
+    def test_api_profile_drops_admin_and_sessions(self):
+        output = self.run_python(
+            'import django; django.setup(); from django.apps import apps; from django.urls import resolve; '
+            'print(apps.is_installed("django.contrib.admin"), apps.is_installed("django.contrib.sessions"), '
+            'resolve("/api/items/").url_name)'
+        )
+        self.assertEqual(output.split(), ['False', 'False', 'item-list-create'])
+
+    def test_api_profile_leaves_full_settings_alone(self):
+        output = self.run_python(
+            'import bidwars.settings as full, bidwars.settings_api as api; '
+            'print(["django.contrib.messages.context_processors.messages" in '
+            's.TEMPLATES[0]["OPTIONS"]["context_processors"] for s in (full, api)])'
+        )
+        self.assertEqual(output.strip(), '[True, False]')
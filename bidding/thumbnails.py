@@ -0,0 +1,106 @@
+"""Item image thumbnails.
+
+Uploading an image only saves the original and enqueues a
+``PendingThumbnail`` row. The ``process_thumbnails`` worker renders one
+fixed-size JPEG per image and stores it under the SHA-256 of its bytes, so a
+thumbnail's URL never changes meaning and can be cached indefinitely.
+
+Workers claim queue rows in a short transaction and render outside of any
+transaction, so slow images never hold locks that bid placement needs.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Item, PendingThumbnail
+
+# A claim older than this is assumed to belong to a worker that died
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def get_thumbnail_size():
+    return getattr(settings, 'BIDDING_THUMBNAIL_SIZE', (320, 320))
+
+
+def thumbnail_path(digest):
+    return Path(settings.MEDIA_ROOT) / 'thumbnails' / digest[:2] / f'{digest}.jpg'
+
+
+def thumbnail_url(digest):
+    return reverse('item-thumbnail', args=[digest]) if digest else None
+
+
+def enqueue_thumbnail(item):
+    """Queue an item whose image changed for thumbnail rendering"""
+    PendingThumbnail.objects.get_or_create(item=item)
+
+
+def render_thumbnail(image_file, size):
+    """Return JPEG bytes of ``image_file`` fitted inside ``size``"""
+    from PIL import Image, ImageOps  # only the worker needs Pillow
+
+    with Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        buffer = io.BytesIO()
+        image.convert('RGB').save(buffer, format='JPEG', quality=85, optimize=True)
+    return buffer.getvalue()
+
+
+def store_thumbnail(data):
+    """Write thumbnail bytes under their SHA-256 and return the digest"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = thumbnail_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return digest
+
+
+def process_pending(batch_size=50):
+    """Render thumbnails for one batch of queued items and return how many were taken off the queue"""
+    from PIL import UnidentifiedImageError
+
+    size = get_thumbnail_size()
+    now = timezone.now()
+    with transaction.atomic():
+        pending = list(
+            PendingThumbnail.objects.select_for_update(skip_locked=True)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - CLAIM_TIMEOUT))
+            .order_by('id')
+            .values_list('id', 'item_id')[:batch_size]
+        )
+        if not pending:
+            return 0
+        PendingThumbnail.objects.filter(id__in=[pk for pk, _ in pending]).update(claimed_at=now)
+    images = dict(Item.objects.filter(pk__in=[item_id for _, item_id in pending]).values_list('pk', 'image'))
+    for pk, item_id in pending:
+        name = images.get(item_id, '')
+        digest = ''
+        if name:
+            try:
+                with Item._meta.get_field('image').storage.open(name) as image_file:
+                    digest = store_thumbnail(render_thumbnail(image_file, size))
+            except (OSError, UnidentifiedImageError):
+                # Missing or unreadable original; leave the item without a thumbnail
+                pass
+        with transaction.atomic():
+            if Item.objects.filter(pk=item_id, image=name).update(thumbnail=digest):
+                PendingThumbnail.objects.filter(id=pk).delete()
+            else:
+                # The image was replaced meanwhile; release it so the next batch renders the new one
+                PendingThumbnail.objects.filter(id=pk).update(claimed_at=None)
+    return len(pending)
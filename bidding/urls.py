@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
 
@@ -13,10 +13,24 @@ urlpatterns = [
     path('items/', views.ItemListCreateView.as_view(), name='item-list-create'),
     path('items/<int:pk>/', views.ItemDetailView.as_view(), name='item-detail'),
     path('items/active/', views.get_active_items, name='active-items'),
+    path('items/highest-bids/', views.get_highest_bids, name='highest-bids'),
     path('items/<int:item_id>/toggle-status/', views.toggle_item_status, name='toggle-item-status'),
     path('items/<int:item_id>/highest-bid/', views.get_current_highest_bid, name='current-highest-bid'),
     path('items/<int:item_id>/bids/', views.ItemBidHistoryView.as_view(), name='item-bid-history'),
+    path('items/<int:item_id>/image/', views.upload_item_image, name='item-image-upload'),
+    re_path(r'^thumbnails/(?P<digest>[0-9a-f]{64})\.jpg$', views.serve_thumbnail, name='item-thumbnail'),
     
     # Bid URLs
     path('bids/', views.BidListCreateView.as_view(), name='bid-list-create'),
+
+    # Analytics URLs (admin only)
+    path('analytics/items/', views.get_item_analytics, name='item-analytics'),
+    path('analytics/items/<int:item_id>/curve/', views.get_price_curve, name='item-price-curve'),
+
+    # Per-user URLs
+    path('me/auctions/', views.MyAuctionsView.as_view(), name='my-auctions'),
+    path('me/notifications/', views.NotificationListView.as_view(), name='notification-list'),
+    path('me/notifications/read/', views.mark_notifications_read, name='notification-mark-read'),
+    path('me/watchlist/', views.WatchlistView.as_view(), name='watchlist'),
+    path('me/watchlist/<int:item_id>/', views.remove_from_watchlist, name='watchlist-remove'),
 ]
\ No newline at end of file
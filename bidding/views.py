@@ -1,16 +1,47 @@
+import asyncio
+import heapq
+import json
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+
 from django.shortcuts import render
-from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import generics, status, permissions, serializers
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import authenticate
-from .models import User, Item, Bid
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import BooleanField, Case, Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
+from . import idempotency
+from .archive import reopen_item
+from .models import User, Item, Bid, ArchivedBid, OutbidNotification, WatchlistEntry
+from .locks import item_locks
+from .notifications import enqueue_outbid
+from .thumbnails import enqueue_thumbnail, thumbnail_path
 from .serializers import (
     UserRegistrationSerializer, UserSerializer, LoginSerializer,
-    ItemSerializer, BidSerializer, BidHistorySerializer
+    ItemSerializer, BidSerializer, BidHistorySerializer,
+    ItemRowSerializer, BidHistoryRowSerializer, MyAuctionSerializer,
+    OutbidNotificationSerializer, ItemImageSerializer, HighestBidRowSerializer,
+    WatchlistEntrySerializer
 )
 
+# Most item ids accepted by one get_highest_bids request
+MAX_HIGHEST_BID_IDS = 100
+
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -23,20 +54,56 @@ class RegisterView(generics.CreateAPIView):
         return context
 
 
-class LoginView(APIView):
-    permission_classes = [permissions.AllowAny]
+login_executor = ThreadPoolExecutor(
+    max_workers=settings.BIDDING_LOGIN_WORKERS, thread_name_prefix='login'
+)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class LoginView(View):
+    """Exchange credentials for a JWT pair.
 
-    def post(self, request):
-        serializer = LoginSerializer(data=request.data)
-        if serializer.is_valid():
+    A plain async view rather than a DRF APIView: under ASGI, sync views all
+    share one thread, so password hashing there would stall every other sync
+    request. Here hashing runs on ``login_executor`` (BIDDING_LOGIN_WORKERS
+    threads).
+    """
+
+    async def post(self, request):
+        try:
+            data = self.parse(request)
+        except ValueError as e:
+            return JsonResponse({'detail': f'JSON parse error - {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        loop = asyncio.get_running_loop()
+        payload, status_code = await loop.run_in_executor(login_executor, self.login, data)
+        return JsonResponse(payload, status=status_code)
+
+    @staticmethod
+    def parse(request):
+        if request.content_type == 'application/json':
+            data = json.loads(request.body or b'{}')
+            if not isinstance(data, dict):
+                raise ValueError('expected an object')
+            return data
+        return request.POST
+
+    @staticmethod
+    def login(data):
+        # Runs outside the request thread, so manage its DB connection like a request would
+        close_old_connections()
+        try:
+            serializer = LoginSerializer(data=data)
+            if not serializer.is_valid():
+                return serializer.errors, status.HTTP_400_BAD_REQUEST
             user = serializer.validated_data['user']
             refresh = RefreshToken.for_user(user)
-            return Response({
+            return {
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
                 'user': UserSerializer(user).data
-            })
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            }, status.HTTP_200_OK
+        finally:
+            close_old_connections()
 
 
 class UserProfileView(generics.RetrieveAPIView):
@@ -52,6 +119,11 @@ class ItemListCreateView(generics.ListCreateAPIView):
     serializer_class = ItemSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        # Read-only listing goes through the row serializer
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(ItemRowSerializer(queryset).data)
+
     def perform_create(self, serializer):
         # Only admin users can create items
         if self.request.user.role != 'admin':
@@ -73,22 +145,200 @@ class ItemDetailView(generics.RetrieveUpdateDestroyAPIView):
                 self.permission_denied(self.request, message="Only admin users can modify items")
         return super().get_permissions()
 
+    def perform_update(self, serializer):
+        reopening = not serializer.instance.is_active and serializer.validated_data.get('is_active')
+        if not reopening:
+            serializer.save()
+            return
+        # Save the other changes with the item still closed, then reopen it
+        item = serializer.save(is_active=False)
+        reopen_item(item.pk)
+        item.is_active = True
+
 
 class BidListCreateView(generics.ListCreateAPIView):
     serializer_class = BidSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        return Bid.objects.filter(**self.get_bid_filter())
+
+    def get_bid_filter(self):
         item_id = self.request.query_params.get('item_id')
         if item_id:
-            return Bid.objects.filter(item_id=item_id)
-        return Bid.objects.filter(user=self.request.user)
+            return {'item_id': item_id}
+        return {'user': self.request.user}
+
+    def list(self, request, *args, **kwargs):
+        # Bids of closed auctions may have been archived; list them too,
+        # merging the two bid_time-ordered querysets
+        querysets = [
+            queryset.select_related('item', 'user')
+            for queryset in (self.get_queryset(), ArchivedBid.objects.filter(**self.get_bid_filter()))
+        ]
+        bids = heapq.merge(*querysets, key=attrgetter('bid_time'), reverse=True)
+        return Response(self.get_serializer(list(bids), many=True).data)
+
+    def create(self, request, *args, **kwargs):
+        """Place a bid, replaying the saved response for a retried Idempotency-Key"""
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            self.idempotency_key = None
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > idempotency.MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'Idempotency-Key must be 1 to {idempotency.MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        self.idempotency_key = (key, idempotency.fingerprint(request.data))
+        # Retries are answered before any validation
+        stored = idempotency.lookup(request.user.pk, key)
+        if stored is not None:
+            return self.replay(stored)
+        try:
+            return super().create(request, *args, **kwargs)
+        except idempotency.Replay as replay:
+            return self.replay(replay.stored)
+        except IntegrityError:
+            # A concurrent request with the same key (on another item) won
+            stored = idempotency.lookup(request.user.pk, key, use_cache=False)
+            if stored is None:
+                raise
+            return self.replay(stored)
+
+    def replay(self, stored):
+        if stored['fingerprint'] != self.idempotency_key[1]:
+            return Response(
+                {'error': 'Idempotency-Key was already used for a different request'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(stored['response'], status=stored['status_code'],
+                        headers={'Idempotent-Replayed': 'true'})
 
     def perform_create(self, serializer):
         # Only player users can place bids
         if self.request.user.role != 'player':
             raise permissions.PermissionDenied("Only player users can place bids")
-        serializer.save(user=self.request.user)
+        item_id = serializer.validated_data['item'].pk
+        # Bids on one item queue on its stripe lock and then the item's row
+        # lock, so Bid.clean re-checks the highest bid without racing
+        with item_locks(item_id), transaction.atomic():
+            item = Item.objects.select_for_update().get(pk=item_id)
+            if self.idempotency_key is not None:
+                # A retry that waited on the row lock, possibly in another
+                # worker, sees the original's committed key and must not bid again
+                stored = idempotency.lookup(self.request.user.pk, self.idempotency_key[0], use_cache=False)
+                if stored is not None:
+                    raise idempotency.Replay(stored)
+            try:
+                bid = serializer.save(user=self.request.user, item=item)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(e.messages)
+            # Delivery happens in the process_outbids worker, not in the request
+            enqueue_outbid(bid)
+            if self.idempotency_key is not None:
+                idempotency.save(self.request.user.pk, *self.idempotency_key,
+                                 status.HTTP_201_CREATED, serializer.data)
+
+
+class MyAuctionsView(generics.ListAPIView):
+    """Items the user has bid on, with their best bid and whether it is still winning.
+
+    Everything comes from one query, which also reads archived bids so closed
+    auctions stay listed. ``?since=<ISO datetime>`` limits the result to
+    items with bids placed after that time, so clients can poll for changes
+    using the largest ``last_activity`` they have seen.
+    """
+    serializer_class = MyAuctionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        live = self.bid_subqueries(Bid, user)
+        # Closed auctions may have some or all of their bids in the archive
+        archived = self.bid_subqueries(ArchivedBid, user)
+        queryset = (
+            Item.objects.filter(
+                Q(pk__in=Bid.objects.filter(user=user).values('item'))
+                | Q(pk__in=ArchivedBid.objects.filter(user=user).values('item'))
+            )
+            .values('is_active', item=F('pk'), item_title=F('title'))
+            .annotate(
+                # Archiving moves the oldest bids first, so live values win
+                my_highest_bid=Coalesce(live['my_highest'], archived['my_highest']),
+                my_bid_count=Coalesce(live['my_count'], 0) + Coalesce(archived['my_count'], 0),
+                current_highest_bid=Coalesce(live['highest'], archived['highest']),
+                leader=Coalesce(live['leader'], archived['leader']),
+                last_activity=Coalesce(live['latest'], archived['latest']),
+            )
+            .annotate(
+                is_winning=Case(
+                    When(leader=user.pk, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+            )
+            .order_by('-last_activity')
+        )
+        since = self.request.query_params.get('since')
+        if since:
+            queryset = queryset.filter(last_activity__gt=self.parse_since(since))
+        return queryset
+
+    @staticmethod
+    def bid_subqueries(model, user):
+        item_bids = model.objects.filter(item=OuterRef('pk'))
+        by_amount = item_bids.order_by('-bid_amount')
+        my_bids = item_bids.filter(user=user).order_by().values('item')
+        return {
+            'my_highest': Subquery(my_bids.annotate(best=Max('bid_amount')).values('best')),
+            'my_count': Subquery(my_bids.annotate(total=Count('pk')).values('total'),
+                                 output_field=IntegerField()),
+            'highest': Subquery(by_amount.values('bid_amount')[:1]),
+            'leader': Subquery(by_amount.values('user')[:1]),
+            'latest': Subquery(item_bids.order_by('-bid_time').values('bid_time')[:1]),
+        }
+
+    @staticmethod
+    def parse_since(value):
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise serializers.ValidationError({'since': 'Enter a valid ISO 8601 datetime.'})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+
+class NotificationListView(generics.ListAPIView):
+    serializer_class = OutbidNotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = OutbidNotification.objects.filter(user=self.request.user).select_related('item')
+        if self.request.query_params.get('unread'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+
+class WatchlistView(generics.ListCreateAPIView):
+    """The user's watched items, listed with ItemRowSerializer in a single query"""
+    serializer_class = WatchlistEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Item.objects.filter(watchers__user=self.request.user).order_by('-watchers__created_at')
+
+    def list(self, request, *args, **kwargs):
+        return Response(ItemRowSerializer(self.get_queryset()).data)
+
+    def perform_create(self, serializer):
+        # Watching an item twice is a no-op rather than an integrity error
+        serializer.instance, _ = WatchlistEntry.objects.get_or_create(
+            user=self.request.user, item=serializer.validated_data['item']
+        )
 
 
 class ItemBidHistoryView(generics.ListAPIView):
@@ -97,7 +347,15 @@ class ItemBidHistoryView(generics.ListAPIView):
 
     def get_queryset(self):
         item_id = self.kwargs['item_id']
-        return Bid.objects.filter(item_id=item_id).order_by('-bid_time')
+        # A closed item's history may be partly or wholly in the archive, so
+        # read both tables in one query; active items have no archived bids
+        live = Bid.objects.filter(item_id=item_id).order_by()
+        archived = ArchivedBid.objects.filter(item_id=item_id).order_by()
+        return live.union(archived, all=True).order_by('-bid_time')
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(BidHistoryRowSerializer(queryset).data)
 
 
 @api_view(['GET'])
@@ -106,7 +364,7 @@ def get_current_highest_bid(request, item_id):
     """Get current highest bid for an item"""
     try:
         item = Item.objects.get(id=item_id)
-        highest_bid = item.bids.order_by('-bid_amount').first()
+        highest_bid = item.get_highest_bid()
         
         if highest_bid:
             data = {
@@ -126,13 +384,29 @@ def get_current_highest_bid(request, item_id):
         return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def get_highest_bids(request):
+    """Get the current highest bid of several items (``?ids=1,2,3``) in one query"""
+    try:
+        ids = [int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()]
+    except ValueError:
+        return Response({'error': 'ids must be a comma-separated list of item ids'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    if not ids:
+        return Response({'error': 'ids is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > MAX_HIGHEST_BID_IDS:
+        return Response({'error': f'At most {MAX_HIGHEST_BID_IDS} ids per request'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    return Response(HighestBidRowSerializer(Item.objects.filter(pk__in=ids).order_by('pk')).data)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_active_items(request):
     """Get all active items for bidding"""
     items = Item.objects.filter(is_active=True)
-    serializer = ItemSerializer(items, many=True)
-    return Response(serializer.data)
+    return Response(ItemRowSerializer(items).data)
 
 
 @api_view(['POST'])
@@ -145,8 +419,12 @@ def toggle_item_status(request, item_id):
     
     try:
         item = Item.objects.get(id=item_id)
-        item.is_active = not item.is_active
-        item.save()
+        if item.is_active:
+            item.is_active = False
+            item.save()
+        else:
+            reopen_item(item.pk)
+            item.is_active = True
         
         return Response({
             'message': f'Item {"activated" if item.is_active else "deactivated"} successfully',
@@ -154,3 +432,149 @@ def toggle_item_status(request, item_id):
         })
     except Item.DoesNotExist:
         return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_notifications_read(request):
+    """Mark all of the user's notifications as read"""
+    updated = OutbidNotification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    return Response({'marked_read': updated})
+
+
+@api_view(['DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def remove_from_watchlist(request, item_id):
+    """Stop watching an item"""
+    deleted, _ = WatchlistEntry.objects.filter(user=request.user, item_id=item_id).delete()
+    if not deleted:
+        return Response({'error': 'Item is not on your watchlist'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+@permission_classes([permissions.IsAuthenticated])
+def upload_item_image(request, item_id):
+    """Upload an item's image (admin only); its thumbnail is rendered by the process_thumbnails worker"""
+    if request.user.role != 'admin':
+        return Response({'error': 'Only admin users can upload item images'},
+                       status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        item = Item.objects.get(id=item_id)
+    except Item.DoesNotExist:
+        return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = ItemImageSerializer(item, data=request.data)
+    serializer.is_valid(raise_exception=True)
+    with transaction.atomic():
+        item = serializer.save(thumbnail='')
+        enqueue_thumbnail(item)
+    return Response({'message': 'Image uploaded; thumbnail pending'}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def get_item_analytics(request):
+    """Per-item bid metrics for all items plus a summary of closed auctions (admin only)"""
+    if request.user.role != 'admin':
+        return Response({'error': 'Only admin users can view analytics'},
+                       status=status.HTTP_403_FORBIDDEN)
+
+    from . import analytics  # NumPy is only loaded once analytics are used
+    stats = analytics.item_stats()
+    return Response({'summary': analytics.summarize(stats), 'items': stats})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def get_price_curve(request, item_id):
+    """Downsampled price curve of an item as [seconds since first bid, amount] pairs (admin only)"""
+    if request.user.role != 'admin':
+        return Response({'error': 'Only admin users can view analytics'},
+                       status=status.HTTP_403_FORBIDDEN)
+
+    from . import analytics
+    try:
+        points = int(request.query_params.get('points', 200))
+    except ValueError:
+        points = None
+    if points not in analytics.CURVE_POINT_CHOICES:
+        return Response({'error': f'points must be one of {list(analytics.CURVE_POINT_CHOICES)}'},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        item = Item.objects.get(id=item_id)
+    except Item.DoesNotExist:
+        return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'item': item.pk, 'points': analytics.price_curve(item, points)})
+
+
+THUMBNAIL_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+@require_safe
+def serve_thumbnail(request, digest):
+    """Serve a content-addressed thumbnail with conditional GET and single byte-range support.
+
+    Public, like any image URL the browser loads without the JWT header.
+    """
+    path = thumbnail_path(digest)
+    try:
+        size = path.stat().st_size
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        raise Http404('Thumbnail not found')
+
+    etag = f'"{digest}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+    if response is None:
+        byte_range = _requested_range(request, etag, size)
+        if byte_range is None:
+            response = FileResponse(path.open('rb'), content_type='image/jpeg')
+        elif byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        else:
+            start, end = byte_range
+            with path.open('rb') as f:
+                f.seek(start)
+                response = HttpResponse(f.read(end - start + 1), status=206, content_type='image/jpeg')
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Cache-Control'] = THUMBNAIL_CACHE_CONTROL
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _requested_range(request, etag, size):
+    """Parse a single ``bytes=`` Range header.
+
+    Returns ``(start, end)``, ``None`` to serve the whole file, or ``False``
+    if the range can't be satisfied.
+    """
+    header = request.headers.get('Range', '')
+    if not header.startswith('bytes=') or ',' in header:
+        # Missing, another unit, or multiple ranges: send the whole file
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            if last and int(last) < start:
+                # Syntactically invalid (RFC 9110 14.1.1), so the header is ignored
+                return None
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    return start, end
@@ -1,8 +1,3 @@
-import os
-from dotenv import load_dotenv
-import dj_database_url
-
-load_dotenv()
 """
 Django settings for bidwars project.
 
@@ -15,12 +10,20 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Only pay for python-dotenv when there is a .env file to load
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -86,6 +89,7 @@ WSGI_APPLICATION = 'bidwars.wsgi.application'
 
 db_url = os.environ.get('DATABASE_URL')
 if db_url:
+    import dj_database_url
     DATABASES = {
         'default': dj_database_url.parse(db_url)
     }
@@ -116,6 +120,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing policy. The first hasher hashes new passwords; the others
+# only verify existing hashes, which are upgraded on the user's next login.
+PASSWORD_HASHERS = [
+    'bidding.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# PBKDF2 work factor for new hashes (Django's default is 1,000,000)
+BIDDING_PASSWORD_ITERATIONS = int(os.environ.get('BIDDING_PASSWORD_ITERATIONS', 1_000_000))
+
+# Threads the async login view hashes passwords on
+BIDDING_LOGIN_WORKERS = int(os.environ.get('BIDDING_LOGIN_WORKERS', 4))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -134,6 +154,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded item images. Thumbnails are served by bidding.views.serve_thumbnail.
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(os.environ.get('MEDIA_ROOT', BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -164,6 +188,7 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Channels settings
 ASGI_APPLICATION = 'bidwars.asgi.application'
@@ -174,5 +199,23 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Number of in-process locks that bid placement stripes items over
+BIDDING_LOCK_STRIPES = 64
+
+# Outbid notifications (see bidding/notifications.py)
+# Repeated outbids on the same item within this window update one notification
+BIDDING_OUTBID_DEDUP_WINDOW = timedelta(minutes=5)
+BIDDING_OUTBID_EMAIL = os.environ.get('BIDDING_OUTBID_EMAIL', '').lower() in ('1', 'true', 'yes')
+
+# Bid responses are replayed for retries with the same Idempotency-Key for this
+# long: from the cache while it holds them, otherwise from the database
+BIDDING_IDEMPOTENCY_TTL = timedelta(hours=24)
+
+# Analytics snapshots of closed items are recomputed after this long
+BIDDING_ANALYTICS_TTL = timedelta(days=1)
+
+# Item image thumbnails are fitted inside this box
+BIDDING_THUMBNAIL_SIZE = (320, 320)
+
 # Custom User Model
 AUTH_USER_MODEL = 'bidding.User'
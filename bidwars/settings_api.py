@@ -0,0 +1,41 @@
+"""
+API-only settings for bidwars worker pools.
+
+Same as bidwars.settings without the admin, session, message and Channels
+stacks and the browsable API, none of which the JSON API needs. Workers start
+faster with less to import. Select with
+DJANGO_SETTINGS_MODULE=bidwars.settings_api.
+"""
+
+import copy
+
+from .settings import *  # noqa: F401,F403
+
+API_EXCLUDED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'channels',
+)
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in API_EXCLUDED_APPS]
+
+# DRF authenticates API requests with JWT, so the session-based auth stack goes too
+API_EXCLUDED_MIDDLEWARE = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+)
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in API_EXCLUDED_MIDDLEWARE]
+
+# A copy, so bidwars.settings keeps its own TEMPLATES when both are imported
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+    if processor != 'django.contrib.messages.context_processors.messages'
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ('rest_framework.renderers.JSONRenderer',),
+}
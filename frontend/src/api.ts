@@ -2,6 +2,9 @@ import axios from 'axios';
 
 const API_BASE_URL = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
+// Thumbnail URLs from the API are paths on the backend
+export const mediaUrl = (path: string) => `${process.env.REACT_APP_BACKEND_URL}${path}`;
+
 const api = axios.create({
   baseURL: API_BASE_URL,
   headers: {
@@ -75,6 +78,7 @@ export interface Item {
   current_highest_bid: string;
   current_highest_bidder: string | null;
   bid_count: number;
+  thumbnail_url: string | null;
 }
 
 export interface Bid {
@@ -93,6 +97,13 @@ export interface BidHistory {
   bid_time: string;
 }
 
+export interface HighestBid {
+  item: number;
+  current_highest_bid: number;
+  current_highest_bidder: string | null;
+  bid_time: string | null;
+}
+
 // Auth API
 export const authAPI = {
   login: async (username: string, password: string) => {
@@ -154,18 +165,47 @@ export const itemsAPI = {
     return response.data;
   },
   
+  // One request for many items instead of getCurrentHighestBid per item
+  getHighestBids: async (ids: number[]): Promise<HighestBid[]> => {
+    const response = await api.get('/items/highest-bids/', { params: { ids: ids.join(',') } });
+    return response.data;
+  },
+  
   getBidHistory: async (id: number) => {
     const response = await api.get(`/items/${id}/bids/`);
     return response.data;
   },
+
+  uploadImage: async (id: number, image: File) => {
+    const formData = new FormData();
+    formData.append('image', image);
+    const response = await api.post(`/items/${id}/image/`, formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
+  },
+};
+
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost);
+// getRandomValues is available everywhere
+const newIdempotencyKey = (): string => {
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID();
+  }
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
 };
 
 // Bids API
 export const bidsAPI = {
   create: async (itemId: number, bidAmount: string) => {
+    // One key per bid: retries of this request (e.g. after a token refresh)
+    // get the original response back instead of placing the bid twice
     const response = await api.post('/bids/', {
       item: itemId,
       bid_amount: bidAmount,
+    }, {
+      headers: { 'Idempotency-Key': newIdempotencyKey() },
     });
     return response.data;
   },
@@ -181,4 +221,21 @@ export const bidsAPI = {
   },
 };
 
+// Watchlist API
+export const watchlistAPI = {
+  getAll: async (): Promise<Item[]> => {
+    const response = await api.get('/me/watchlist/');
+    return response.data;
+  },
+
+  add: async (itemId: number) => {
+    const response = await api.post('/me/watchlist/', { item: itemId });
+    return response.data;
+  },
+
+  remove: async (itemId: number) => {
+    await api.delete(`/me/watchlist/${itemId}/`);
+  },
+};
+
 export default api;
\ No newline at end of file
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../AuthContext';
-import { Item as StartupIdea, itemsAPI, bidsAPI } from '../api';
+import { Item as StartupIdea, itemsAPI, bidsAPI, mediaUrl } from '../api';
 import { Link } from 'react-router-dom';
 
 const BiddingPage: React.FC = () => {
@@ -95,6 +95,14 @@ const BiddingPage: React.FC = () => {
           <div className="grid gap-6 grid-cols-1 sm:grid-cols-2 lg:grid-cols-3">
             {items.map((item) => (
               <div key={item.id} className="bg-gray-800 rounded-lg shadow-md overflow-hidden flex flex-col h-full">
+                {item.thumbnail_url && (
+                  <img
+                    src={mediaUrl(item.thumbnail_url)}
+                    alt={item.title}
+                    loading="lazy"
+                    className="w-full h-48 object-cover"
+                  />
+                )}
                 <div className="p-6 flex-1 flex flex-col justify-between">
                   <h3 className="text-lg font-semibold text-white mb-2 break-words">
                     {item.title}